@@ -1,102 +1,27 @@
-from flask import Flask, render_template, jsonify, request
-from get_ics import fetch_and_update_ics, approve_event, remove_approval
+from flask import Flask, render_template, jsonify, request, g, Response, send_file
+from get_ics import sync_events, get_latest_snapshot, get_feed_health, get_reconcile_report, reconcile_blocked_calendars, load_warm_start, approve_event, remove_approval
+from markupsafe import Markup
+from events import CONTENT_ENCODINGS, compress, encode_json
+import jobs
+import metrics
+import profiling
+import hmac
 import os
+import secrets
 import sqlite3
-import subprocess
-import threading
-import sys
-from pathlib import Path
-from datetime import datetime
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
 app = Flask(__name__)
 DATABASE = os.getenv('DATABASE_PATH', 'calmanage.db')
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+PROFILE_REQUESTS = os.getenv('PROFILE_REQUESTS', '0') == '1'
+# Monitoring polls would otherwise fill the profile ring and evict the requests worth profiling
+PROFILE_EXCLUDED_PATHS = ('/api/profiles', '/static', '/api/metrics', '/api/feeds/health')
 
-workscrape_lock = threading.Lock()
-workscrape_process = None
-workscrape_output = []
-workscrape_started_at = None
-workscrape_finished_at = None
-workscrape_return_code = None
-
-WORKSCRAPE_INTERVAL_SECONDS = 3600  # 1 hour
-
-
-def _run_workscrape():
-    global workscrape_process, workscrape_output, workscrape_started_at, workscrape_finished_at, workscrape_return_code
-
-    with workscrape_lock:
-        if workscrape_process and workscrape_process.poll() is None:
-            return  # Already running
-
-    script_path = Path(app.root_path).parent / 'workscrape.py'
-    if not script_path.exists():
-        return
-
-    env = os.environ.copy()
-    env['PYTHONUNBUFFERED'] = '1'
-
-    process = subprocess.Popen(
-        [sys.executable, '-u', str(script_path)],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
-        cwd=str(script_path.parent),
-        env=env
-    )
-
-    with workscrape_lock:
-        workscrape_process = process
-        workscrape_output = ['Starting workscrape.py...']
-        workscrape_started_at = datetime.utcnow().isoformat() + 'Z'
-        workscrape_finished_at = None
-        workscrape_return_code = None
-
-    reader_thread = threading.Thread(target=_workscrape_reader, args=(process,), daemon=True)
-    reader_thread.start()
-
-
-def _workscrape_scheduler():
-    while True:
-        _run_workscrape()
-        threading.Event().wait(WORKSCRAPE_INTERVAL_SECONDS)
-
-
-scheduler_thread = threading.Thread(target=_workscrape_scheduler, daemon=True)
-scheduler_thread.start()
-
-
-def _append_workscrape_output(line):
-    global workscrape_output
-    with workscrape_lock:
-        workscrape_output.append(line.rstrip())
-        if len(workscrape_output) > 1000:
-            workscrape_output = workscrape_output[-1000:]
-
-
-def _workscrape_reader(proc):
-    global workscrape_process, workscrape_finished_at, workscrape_return_code
-
-    if proc.stdout:
-        for line in iter(proc.stdout.readline, ''):
-            if not line:
-                break
-            _append_workscrape_output(line)
-
-    proc.wait()
-
-    with workscrape_lock:
-        workscrape_return_code = proc.returncode
-        workscrape_finished_at = datetime.utcnow().isoformat() + 'Z'
-        workscrape_process = None
-
-    if proc.returncode == 0:
-        _append_workscrape_output('workscrape.py finished successfully.')
-    else:
-        _append_workscrape_output(f'workscrape.py exited with code {proc.returncode}.')
+WORKSCRAPE_ENABLED = os.getenv('WORKSCRAPE_ENABLED', '1') == '1'
 
 def get_db():
     """Get database connection"""
@@ -104,11 +29,17 @@ def get_db():
     conn.row_factory = sqlite3.Row
     return conn
 
+SETTINGS_TABLES = ('event_buffers', 'event_privacy', 'ignored_events')
+DATABASE_EPOCH_KEY = '_epoch'  # table_versions row holding the random per-database epoch
+
 def init_db():
     """Initialize database tables"""
     conn = get_db()
     cursor = conn.cursor()
     
+    # WAL lets several web workers read while one writes
+    cursor.execute('PRAGMA journal_mode=WAL')
+    
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS event_buffers (
             id INTEGER PRIMARY KEY,
@@ -138,29 +69,181 @@ def init_db():
         )
     ''')
     
+    # Per-table change counters, bumped by triggers so every process sees them (used for ETags)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    
+    # Random per-database epoch: the counters restart at 0 in a new or replaced database file,
+    # so without it the same ETag could stand for different content
+    cursor.execute('INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, ?)',
+                   (DATABASE_EPOCH_KEY, secrets.randbits(62)))
+    
+    for table in SETTINGS_TABLES:
+        cursor.execute('INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)', (table,))
+        for operation in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{operation.lower()}
+                AFTER {operation} ON {table}
+                BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+                END
+            ''')
+    
     conn.commit()
     conn.close()
+    
+    jobs.init_job_tables()
 
 # Initialize database on startup
 init_db()
 
+# Parse worker processes (PARSE_WORKERS) re-import the main module as __mp_main__
+# and must not load caches or start background jobs.
+if __name__ != '__mp_main__':
+    # Serve the last good snapshot straight away instead of waiting for a cold sync
+    load_warm_start()
+    
+    # Share this worker's metrics with whichever worker answers /api/metrics
+    metrics.start_multiprocess_flush()
+    
+    # Every worker runs the scheduler thread, but only the process holding the
+    # scheduler lock runs jobs.
+    if WORKSCRAPE_ENABLED:
+        jobs.start_scheduler()
+
+def get_table_versions():
+    """Get the change counters of the settings tables as {table: version}"""
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('SELECT table_name, version FROM table_versions')
+    versions = {row['table_name']: row['version'] for row in cursor.fetchall()}
+    conn.close()
+    return versions
+
+def _negotiate_encoding():
+    return request.accept_encodings.best_match(CONTENT_ENCODINGS, default='identity') or 'identity'
+
+def _encoded_response(body, encoding, etag):
+    response = Response(body, mimetype='application/json')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.set_etag(etag)
+    return response
+
+def _conditional_response(etag_base, build_body):
+    """
+    Answer with 304 when If-None-Match carries our strong ETag, otherwise with the
+    compressed body. build_body(encoding) is only called when the body is needed.
+    """
+    encoding = _negotiate_encoding()
+    # Strong ETags must differ per representation, so the encoding is part of it
+    etag = f"{etag_base}-{encoding}"
+    # The page embeds the bare base tag (see index()), which matches any encoding
+    if request.if_none_match.contains(etag) or request.if_none_match.contains(etag_base):
+        response = Response(status=304)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.set_etag(etag)
+        return response
+    return _encoded_response(build_body(encoding), encoding, etag)
+
+def _conditional_json(etag_base, build_payload):
+    return _conditional_response(etag_base, lambda encoding: compress(encode_json(build_payload()), encoding))
+
+def _is_admin():
+    token = request.headers.get('X-Admin-Token') or ''
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.before_request
+def _start_profiling():
+    # Profile everything when PROFILE_REQUESTS=1, otherwise only admin requests with X-Profile: 1
+    if request.path.startswith(PROFILE_EXCLUDED_PATHS):
+        return
+    if PROFILE_REQUESTS or (request.headers.get('X-Profile') == '1' and _is_admin()):
+        g.profile_session = profiling.ProfileSession(f"{request.method} {request.path}")
+
+@app.after_request
+def _stop_profiling(response):
+    session = getattr(g, 'profile_session', None)
+    if session is not None:
+        g.profile_session = None
+        try:
+            profile = session.stop()
+            response.headers['X-Profile-Name'] = profile['name']
+        except Exception as e:
+            print(f"Error saving profile: {e}")
+    return response
+
+@app.after_request
+def _record_request_latency(response):
+    request_start = getattr(g, 'request_start', None)
+    if request_start is not None:
+        # Use the route pattern rather than the raw path to keep label cardinality bounded
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.ROUTE_SECONDS.observe(
+            time.perf_counter() - request_start,
+            method=request.method,
+            route=route,
+            status=response.status_code
+        )
+    return response
+
+@app.route("/api/profiles")
+def api_profiles():
+    """List recent request profiles (admin only)"""
+    if not _is_admin():
+        return jsonify({'success': False, 'message': 'Forbidden'}), 403
+    return jsonify(profiling.list_profiles())
+
+@app.route("/api/profiles/<filename>")
+def api_profile_file(filename):
+    """Download a saved .pstats or .collapsed profile (admin only)"""
+    if not _is_admin():
+        return jsonify({'success': False, 'message': 'Forbidden'}), 403
+    path = profiling.profile_path(filename)
+    if not path:
+        return jsonify({'success': False, 'message': 'Profile not found'}), 404
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=filename)
+
+@app.route("/api/metrics")
+def api_metrics():
+    """Expose metrics in Prometheus text format"""
+    return Response(metrics.render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+def _inline_json(data):
+    """Make JSON bytes safe to embed in a <script> element"""
+    return Markup(data.replace(b'<', b'\\u003c').replace(b'>', b'\\u003e').replace(b'&', b'\\u0026').decode('utf-8'))
+
 @app.route("/")
 def index():
-    return render_template("index.html")
+    # Embed settings and the latest cached events so the first paint needs no API calls
+    snapshot = get_latest_snapshot()
+    state = b''.join((
+        b'{"settings":', encode_json(load_settings()),
+        b',"eventsEtag":', encode_json(f'"events-{snapshot.version}"') if snapshot else b'null',
+        b',"events":', snapshot.json_bytes() if snapshot else b'null',
+        b'}'
+    ))
+    return render_template("index.html", initial_state=_inline_json(state))
 
 
 @app.route('/api/workscrape/start', methods=['POST'])
 def start_workscrape():
-    with workscrape_lock:
-        if workscrape_process and workscrape_process.poll() is None:
-            return jsonify({'success': False, 'message': 'workscrape.py is already running'}), 409
-
-    script_path = Path(app.root_path).parent / 'workscrape.py'
+    script_path = jobs.WORKSCRAPE_SCRIPT
     if not script_path.exists():
         return jsonify({'success': False, 'message': f'Cannot find {script_path.name}'}), 404
 
     try:
-        _run_workscrape()
+        if not jobs.run_workscrape():
+            return jsonify({'success': False, 'message': 'workscrape.py is already running'}), 409
         return jsonify({'success': True, 'message': 'workscrape.py started'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -168,19 +251,10 @@ def start_workscrape():
 
 @app.route('/api/workscrape/status', methods=['GET'])
 def workscrape_status():
-    with workscrape_lock:
-        running = bool(workscrape_process and workscrape_process.poll() is None)
-        return jsonify({
-            'running': running,
-            'output': workscrape_output,
-            'started_at': workscrape_started_at,
-            'finished_at': workscrape_finished_at,
-            'return_code': workscrape_return_code
-        })
+    return jsonify(jobs.get_workscrape_status())
 
-@app.route("/api/init")
-def api_init():
-    """Load all initial data: buffers, privacy settings, and ignored events"""
+def load_settings():
+    """Load all settings: buffers, privacy settings, and ignored events"""
     conn = get_db()
     cursor = conn.cursor()
     
@@ -211,23 +285,59 @@ def api_init():
     
     conn.close()
     
-    return jsonify({
+    return {
         'buffers': buffers,
         'privacy': privacy,
         'ignored': ignored
-    })
+    }
+
+def _settings_etag(*tables):
+    versions = get_table_versions()
+    return f"settings-{versions.get(DATABASE_EPOCH_KEY, 0):x}-" + '.'.join(str(versions.get(table, 0)) for table in tables)
+
+@app.route("/api/init")
+def api_init():
+    """Load all initial data: buffers, privacy settings, and ignored events"""
+    return _conditional_json(_settings_etag(*SETTINGS_TABLES), load_settings)
+
+def _snapshot_response(snapshot):
+    """Serve the cached encoded bytes of a snapshot, or 304 if the client has them"""
+    # The snapshot version is a digest of its content, which already reflects the buffers
+    response = _conditional_response(f"events-{snapshot.version}", snapshot.encoded_bytes)
+    if snapshot.stale_feeds:
+        response.headers['X-Stale-Feeds'] = ','.join(snapshot.stale_feeds)
+    return response
 
 @app.route("/api/pending_events")
 def pending_events():
     try:
-        events = fetch_and_update_ics()
-        return jsonify(events)
+        snapshot = sync_events()
+        return _snapshot_response(snapshot)
     except Exception as e:
         print(f"Error in pending_events: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@app.route("/api/feeds/health")
+def feeds_health():
+    """Per-feed fetch health and circuit breaker state"""
+    return jsonify(get_feed_health())
+
+@app.route("/api/blocked/reconcile", methods=['GET', 'POST'])
+def blocked_reconcile():
+    """Last orphaned blocked event report (GET), or run a pass now (POST, admin only)"""
+    if request.method == 'GET':
+        return jsonify(get_reconcile_report())
+    if not _is_admin():
+        return jsonify({'success': False, 'message': 'Forbidden'}), 403
+    data = request.get_json(silent=True) or {}
+    try:
+        return jsonify(reconcile_blocked_calendars(dry_run=data.get('dry_run', True)))
+    except Exception as e:
+        print(f"Error reconciling blocked calendars: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @app.route("/api/approve", methods=['POST'])
 def approve():
     data = request.get_json()
@@ -253,6 +363,9 @@ def approve():
 @app.route("/api/buffers", methods=['GET'])
 def get_buffers():
     """Get all saved buffers"""
+    return _conditional_json(_settings_etag('event_buffers'), _load_buffers)
+
+def _load_buffers():
     conn = get_db()
     cursor = conn.cursor()
     cursor.execute('SELECT event_uid, source, buffer_before, buffer_after FROM event_buffers')
@@ -265,7 +378,7 @@ def get_buffers():
             'before': row['buffer_before'],
             'after': row['buffer_after']
         }
-    return jsonify(buffers)
+    return buffers
 
 @app.route("/api/buffers", methods=['POST'])
 def save_buffers():
@@ -293,6 +406,9 @@ def save_buffers():
 @app.route("/api/privacy", methods=['GET'])
 def get_privacy():
     """Get all saved privacy settings"""
+    return _conditional_json(_settings_etag('event_privacy'), _load_privacy)
+
+def _load_privacy():
     conn = get_db()
     cursor = conn.cursor()
     cursor.execute('SELECT event_uid, use_generic_title, use_generic_description FROM event_privacy')
@@ -305,7 +421,7 @@ def get_privacy():
             'useGenericTitle': bool(row['use_generic_title']),
             'useGenericDescription': bool(row['use_generic_description'])
         }
-    return jsonify(privacy)
+    return privacy
 
 @app.route("/api/privacy", methods=['POST'])
 def save_privacy():
@@ -333,14 +449,16 @@ def save_privacy():
 @app.route("/api/ignored", methods=['GET'])
 def get_ignored():
     """Get all ignored event UIDs"""
+    return _conditional_json(_settings_etag('ignored_events'), _load_ignored)
+
+def _load_ignored():
     conn = get_db()
     cursor = conn.cursor()
     cursor.execute('SELECT event_uid FROM ignored_events')
     rows = cursor.fetchall()
     conn.close()
     
-    ignored = [row['event_uid'] for row in rows]
-    return jsonify(ignored)
+    return [row['event_uid'] for row in rows]
 
 @app.route("/api/ignored", methods=['POST'])
 def add_ignored():
@@ -0,0 +1,112 @@
+from collections import namedtuple
+from datetime import datetime, timezone
+import gzip
+import hashlib
+import json
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional, only gzip is offered without it
+    brotli = None
+
+# Content encodings we can produce, in order of preference
+CONTENT_ENCODINGS = (('br',) if brotli is not None else ()) + ('gzip', 'identity')
+
+
+def _isoformat(epoch):
+    """Format UTC epoch seconds the way the API has always returned times"""
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+class EventRecord(namedtuple('EventRecord', ['start', 'end', 'source', 'uid', 'title', 'location', 'description', 'status'])):
+    """
+    Compact event as used between parsing and serialization.
+
+    start/end are UTC epoch seconds; they are only formatted in to_dict().
+    Field order makes records sort chronologically.
+    """
+    __slots__ = ()
+
+    def to_dict(self):
+        return {
+            "uid": self.uid,
+            "source": self.source,
+            "title": self.title,
+            "start": _isoformat(self.start),
+            "end": _isoformat(self.end),
+            "location": self.location,
+            "description": self.description,
+            "status": self.status
+        }
+
+
+def compress(data, encoding):
+    """Compress bytes for the given Content-Encoding ('br', 'gzip' or 'identity')"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    return data
+
+
+def encode_json(obj):
+    """Encode obj as compact UTF-8 JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class EventSnapshot:
+    """
+    Immutable result of one sync. Encoded (and compressed) JSON is computed once
+    per snapshot and encoding, and reused for every response served from it.
+    """
+    __slots__ = ('events', 'created_at', 'stale_feeds', '_lock', '_json', '_encoded', '_version')
+
+    def __init__(self, events, created_at=None, stale_feeds=()):
+        self.events = tuple(events)
+        self.created_at = created_at or time.time()
+        # Feeds whose events come from the last good fetch because the current one failed
+        self.stale_feeds = tuple(sorted(stale_feeds))
+        self._lock = threading.Lock()
+        self._json = None
+        self._encoded = {}
+        self._version = None
+
+    def __len__(self):
+        return len(self.events)
+
+    def to_dicts(self):
+        return [event.to_dict() for event in self.events]
+
+    def json_bytes(self):
+        with self._lock:
+            if self._json is None:
+                self._json = encode_json(self.to_dicts())
+            return self._json
+
+    def encoded_bytes(self, encoding):
+        """JSON bytes compressed with the given Content-Encoding, cached per encoding"""
+        data = self.json_bytes()
+        if encoding == 'identity':
+            return data
+        with self._lock:
+            if encoding not in self._encoded:
+                self._encoded[encoding] = compress(data, encoding)
+            return self._encoded[encoding]
+
+    @property
+    def version(self):
+        """Content digest, identical across processes for identical event lists"""
+        data = self.json_bytes()
+        with self._lock:
+            if self._version is None:
+                self._version = hashlib.blake2b(data, digest_size=8).hexdigest()
+            return self._version
@@ -4,11 +4,18 @@ from dateutil.rrule import rrulestr
 from dateutil.parser import parse
 from datetime import datetime, timedelta, timezone
 import uuid
+import hashlib
 import sqlite3
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, TimeoutError as FuturesTimeoutError
+import multiprocessing
+import threading
 import time
 import os
 from dotenv import load_dotenv
+import metrics
+import jobs
+from events import EventRecord, EventSnapshot
+import warm_cache
 # from .models import db, Event
 
 load_dotenv()
@@ -27,6 +34,30 @@ BLOCKED_CALENDAR_URLS = {
 
 SYNC_WINDOW_DAYS = int(os.getenv('SYNC_WINDOW_DAYS', '90'))
 DATABASE = os.getenv('DATABASE_PATH', 'calmanage.db')
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', '0'))  # 0 = parse in the request thread
+
+# Feeds still downloading after this many seconds are served from their last good
+# result while the download finishes in the background
+SYNC_DEADLINE_SECONDS = float(os.getenv('SYNC_DEADLINE_SECONDS', '4'))
+# Send a second request for a feed that has not answered after this many seconds (0 = off)
+FEED_HEDGE_AFTER_SECONDS = float(os.getenv('FEED_HEDGE_AFTER_SECONDS', '0'))
+# Circuit breaker: after this many consecutive failures, stop fetching a feed for a
+# backoff that doubles per further failure, up to FEED_BACKOFF_MAX_SECONDS
+FEED_FAILURE_THRESHOLD = int(os.getenv('FEED_FAILURE_THRESHOLD', '3'))
+FEED_BACKOFF_SECONDS = float(os.getenv('FEED_BACKOFF_SECONDS', '30'))
+FEED_BACKOFF_MAX_SECONDS = float(os.getenv('FEED_BACKOFF_MAX_SECONDS', '900'))
+# Orphaned blocked events (source event gone, or already over) are reported
+# ('dry-run'), deleted ('delete') or ignored ('off') after a sync, at most once per interval,
+# by the process holding the scheduler lock
+BLOCKED_RECONCILE_MODE = os.getenv('BLOCKED_RECONCILE_MODE', 'dry-run')
+BLOCKED_RECONCILE_INTERVAL_SECONDS = int(os.getenv('BLOCKED_RECONCILE_INTERVAL_SECONDS', '3600'))
+BLOCKED_RECONCILE_BATCH_SIZE = 50
+BLOCKED_RECONCILE_WORKERS = 4
+# Feed rows are only trusted (to skip unchanged approvals, or to find orphaned blocked
+# events) if this process fetched them this recently, and after the last write to any
+# blocked calendar by any process
+BLOCKED_INDEX_MAX_AGE_SECONDS = int(os.getenv('BLOCKED_INDEX_MAX_AGE_SECONDS', '300'))
+BLOCKED_WRITES_STAMP_PATH = os.getenv('BLOCKED_WRITES_STAMP_PATH') or f"{DATABASE}.blocked-writes"
 
 def get_all_event_buffers():
     """Get all buffers from the database at once (more efficient than per-event queries)"""
@@ -57,119 +88,343 @@ def get_buffer_for_event(uid, source, buffers_cache):
     return 0, 0
 
 
-def _fetch_url(url, timeout=10):
-    """Helper function to fetch a URL. Returns tuple (url, content, error)"""
+def _fetch_url(url, timeout=10, feed=None, validators=None):
+    """
+    Helper function to fetch a URL, conditionally when validators are given.
+    Returns tuple (url, content, error, validators); content and error are both
+    None when the server answered 304 Not Modified.
+    """
+    fetch_start = time.time()
+    headers = {}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
     try:
-        response = requests.get(url, timeout=timeout)
+        response = requests.get(url, timeout=timeout, headers=headers)
+        if response.status_code == 304:
+            if feed:
+                metrics.FEED_FETCH_SECONDS.observe(time.time() - fetch_start, feed=feed)
+            return (url, None, None, validators)
         response.raise_for_status()
-        return (url, response.content, None)
+        if feed:
+            metrics.FEED_FETCH_SECONDS.observe(time.time() - fetch_start, feed=feed)
+            metrics.FEED_BYTES.observe(len(response.content), feed=feed)
+        new_validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+        return (url, response.content, None, new_validators)
     except Exception as e:
-        return (url, None, e)
+        if feed:
+            metrics.FEED_FETCH_SECONDS.observe(time.time() - fetch_start, feed=feed)
+            metrics.FEED_ERRORS.inc(feed=feed, stage='fetch')
+        return (url, None, e, None)
 
 
-def _parse_calendar_events(cal_content, source_name, approved_events, now, window_end, buffers_cache):
-    """Parse calendar content and return list of events"""
-    events = []
+def _fetch_feed(url, feed=None, validators=None):
+    """Fetch a feed like _fetch_url, hedging with a second request if the first is slow"""
+    if FEED_HEDGE_AFTER_SECONDS <= 0:
+        return _fetch_url(url, feed=feed, validators=validators)
+    
+    executor = ThreadPoolExecutor(max_workers=2)
     try:
-        cal = Calendar.from_ical(cal_content)
+        first = executor.submit(_fetch_url, url, feed=feed, validators=validators)
+        done, _ = wait([first], timeout=FEED_HEDGE_AFTER_SECONDS)
+        if done:
+            return first.result()
         
-        for component in cal.walk():
-            if component.name != "VEVENT":
-                continue
-            
-            dtstart = component.get("dtstart").dt
-            if isinstance(dtstart, datetime):
-                dtstart = dtstart.astimezone(timezone.utc)
-            else:
-                dtstart = datetime.combine(dtstart, datetime.min.time(), tzinfo=timezone.utc)
-                
-            if dtstart < now or dtstart > window_end:
-                continue
-            
-            dtend = component.get("dtend").dt if component.get("dtend") else dtstart
-            if isinstance(dtend, datetime):
-                dtend = dtend.astimezone(timezone.utc)
-            else:
-                dtend = datetime.combine(dtend, datetime.min.time(), tzinfo=timezone.utc)
+        metrics.FEED_HEDGED.inc(feed=feed)
+        second = executor.submit(_fetch_url, url, feed=feed, validators=validators)
+        result = None
+        for future in as_completed([first, second]):
+            result = future.result()
+            if result[2] is None:  # First answer without an error wins
+                return result
+        return result
+    finally:
+        # Don't wait for the losing request; it ends on its own timeout
+        executor.shutdown(wait=False)
+
+
+_feed_health = {}  # {feed: {consecutive_failures, open_until, last_success, last_error, last_error_at}}
+_feed_health_lock = threading.Lock()
+
+
+def _feed_allowed(feed):
+    """Circuit breaker check: False while a failing feed is backing off"""
+    with _feed_health_lock:
+        health = _feed_health.get(feed)
+        return not health or time.time() >= health['open_until']
+
+
+def _record_feed_success(feed):
+    with _feed_health_lock:
+        health = _feed_health.setdefault(feed, {'last_error': None, 'last_error_at': None})
+        health.update(consecutive_failures=0, open_until=0, last_success=time.time())
+
+
+def _record_feed_failure(feed, error):
+    with _feed_health_lock:
+        health = _feed_health.setdefault(feed, {'consecutive_failures': 0, 'open_until': 0, 'last_success': None})
+        failures = health['consecutive_failures'] + 1
+        health.update(consecutive_failures=failures, last_error=str(error), last_error_at=time.time())
+        if failures >= FEED_FAILURE_THRESHOLD:
+            backoff = min(FEED_BACKOFF_SECONDS * 2 ** (failures - FEED_FAILURE_THRESHOLD), FEED_BACKOFF_MAX_SECONDS)
+            health['open_until'] = time.time() + backoff
+
+
+def get_feed_health():
+    """Per-feed health as seen by this process"""
+    now = time.time()
+    with _feed_health_lock:
+        return {
+            feed: dict(health, circuit_open=now < health['open_until'])
+            for feed, health in _feed_health.items()
+        }
+
+
+def _to_epoch(value):
+    """Convert an icalendar date or datetime to UTC epoch seconds"""
+    if isinstance(value, datetime):
+        return int(value.astimezone(timezone.utc).timestamp())
+    return int(datetime.combine(value, datetime.min.time(), tzinfo=timezone.utc).timestamp())
+
+
+def _parse_feed(cal_content, window_start=None, window_end=None):
+    """
+    Parse ICS content into compact event tuples.
+    
+    This runs inside parse worker processes when PARSE_WORKERS is set, so it must
+    only depend on its arguments and return picklable data.
+    
+    Args:
+        cal_content: Raw ICS bytes
+        window_start: Skip events starting before this epoch (None = no filter)
+        window_end: Skip events starting after this epoch (None = no filter)
+    
+    Returns:
+        tuple (parse_seconds, vevent_count, rows, malformed) where each row is
+        (uid, title, start, end, location, description) with times as epoch seconds
+        and malformed counts VEVENTs that were skipped (e.g. without DTSTART)
+    """
+    parse_start = time.perf_counter()
+    rows = []
+    vevent_count = 0
+    malformed = 0
+    cal = Calendar.from_ical(cal_content)
+    
+    for component in cal.walk():
+        if component.name != "VEVENT":
+            continue
+        vevent_count += 1
+        
+        # One broken event must not cost the rest of the feed
+        try:
+            start = _to_epoch(component.get("dtstart").dt)
+            end = _to_epoch(component.get("dtend").dt) if component.get("dtend") else start
+        except Exception:
+            malformed += 1
+            continue
+        
+        if window_start is not None and start < window_start:
+            continue
+        if window_end is not None and start > window_end:
+            continue
+        
+        rows.append((
+            str(component.get("uid", "")),
+            str(component.get("summary", "No Title")),
+            start,
+            end,
+            str(component.get("location", "")),
+            str(component.get("description", ""))
+        ))
+    
+    return time.perf_counter() - parse_start, vevent_count, rows, malformed
+
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def _get_parse_pool():
+    """Lazily create the shared parse process pool (None when PARSE_WORKERS is 0)"""
+    global _parse_pool
+    if PARSE_WORKERS <= 0:
+        return None
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # spawn rather than fork: the web app is multi-threaded when this is first called
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _parse_pool
+
+
+def _classify_events(rows, source_name, approved_events, buffers_cache):
+    """Turn parsed rows from a main calendar into event records with approval status"""
+    events = []
+    approved_for_source = approved_events.get(source_name, {})
+    
+    for uid, title, start, end, location, description in rows:
+        # Check if this event is already approved and verify times
+        status = "pending"
+        if uid in approved_for_source:
+            approved_start, approved_end = approved_for_source[uid]
             
-            uid = str(component.get("uid", ""))
+            # Get the buffers from cache (no DB hit)
+            buffer_before, buffer_after = get_buffer_for_event(uid, source_name, buffers_cache)
             
-            # Check if this event is already approved and verify times
-            status = "pending"
-            if source_name in approved_events and uid in approved_events[source_name]:
-                approved_start, approved_end = approved_events[source_name][uid]
-                
-                # Get the buffers from cache (no DB hit)
-                buffer_before, buffer_after = get_buffer_for_event(uid, source_name, buffers_cache)
-                
-                # Remove buffers from approved times to get original times
-                original_approved_start = approved_start + timedelta(minutes=buffer_before)
-                original_approved_end = approved_end - timedelta(minutes=buffer_after)
-                
-                # Allow a small time difference (1 minute) for timezone/formatting variations
-                time_diff = abs((dtstart - original_approved_start).total_seconds()) + abs((dtend - original_approved_end).total_seconds())
-                if time_diff > 60:  # More than 1 minute difference
-                    status = "time_changed"
-                else:
-                    status = "approved"
+            # Remove buffers from approved times to get original times
+            original_approved_start = approved_start + buffer_before * 60
+            original_approved_end = approved_end - buffer_after * 60
             
-            events.append({
-                "uid": uid,
-                "source": source_name,
-                "title": str(component.get("summary", "No Title")),
-                "start": dtstart.isoformat(),
-                "end": dtend.isoformat(),
-                "location": str(component.get("location", "")),
-                "description": str(component.get("description", "")),
-                "status": status
-            })
-    except Exception as e:
-        print(f"Error parsing calendar for {source_name}: {e}")
+            # Allow a small time difference (1 minute) for timezone/formatting variations
+            time_diff = abs(start - original_approved_start) + abs(end - original_approved_end)
+            if time_diff > 60:  # More than 1 minute difference
+                status = "time_changed"
+            else:
+                status = "approved"
+        
+        events.append(EventRecord(start, end, source_name, uid, title, location, description, status))
     
     return events
 
 
-def _parse_blocked_calendar(cal_content, source_name):
-    """Parse a blocked calendar and return dict of {uid: (start, end)}"""
-    events_dict = {}
+def _work_events(rows):
+    """Turn parsed rows from the work calendar into (already approved) event records"""
+    return [EventRecord(start, end, "Work", uid, title, location, description, "approved")
+            for uid, title, start, end, location, description in rows]
+
+
+_latest_snapshot = None
+_snapshot_lock = threading.Lock()
+
+# Parsed rows and HTTP validators per feed: {feed: {url_hash, etag, last_modified, vevent_count, rows}}
+_feed_cache = {}
+
+
+def _store_feed_cache(feed, url, validators, vevent_count, rows):
+    """Remember a feed's parsed rows and validators; returns True if anything changed"""
+    entry = {
+        'url_hash': warm_cache.url_hash(url),
+        'etag': (validators or {}).get('etag'),
+        'last_modified': (validators or {}).get('last_modified'),
+        'vevent_count': vevent_count,
+        'rows': rows
+    }
+    with _snapshot_lock:
+        if _feed_cache.get(feed) == entry:
+            return False
+        _feed_cache[feed] = entry
+        return True
+
+
+# Content hashes of blocked events by calendar, built lazily from the cached blocked feed rows:
+# {calendar_name: (rows, {uid: content hash})}
+_blocked_hashes = {}
+# When this process started the last successful (200 or 304) fetch of each feed: {feed: epoch}.
+# Rows loaded from the warm cache or served as a stale fallback never get an entry.
+_feed_fetched_at = {}
+
+
+def _blocked_content_hash(title, start, end, description):
+    """Hash of the parts of a blocked event that approve_event writes (times as epoch seconds)"""
+    content = repr((title, start, end, description or "")).encode('utf-8')
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def _mark_blocked_written():
+    """Tell every process that the blocked calendars changed since their last fetch"""
     try:
-        cal = Calendar.from_ical(cal_content)
-        
-        for component in cal.walk():
-            if component.name != "VEVENT":
-                continue
-            
-            uid = str(component.get("uid", ""))
-            if uid:
-                # Store the start and end times
-                dtstart = component.get("dtstart").dt
-                if isinstance(dtstart, datetime):
-                    dtstart = dtstart.astimezone(timezone.utc)
-                else:
-                    dtstart = datetime.combine(dtstart, datetime.min.time(), tzinfo=timezone.utc)
-                
-                dtend = component.get("dtend").dt if component.get("dtend") else dtstart
-                if isinstance(dtend, datetime):
-                    dtend = dtend.astimezone(timezone.utc)
-                else:
-                    dtend = datetime.combine(dtend, datetime.min.time(), tzinfo=timezone.utc)
-                
-                events_dict[uid] = (dtstart, dtend)
-    except Exception as e:
-        print(f"Error parsing blocked calendar for {source_name}: {e}")
-    
-    return events_dict
+        with open(BLOCKED_WRITES_STAMP_PATH, 'a'):
+            pass
+        os.utime(BLOCKED_WRITES_STAMP_PATH, None)
+    except OSError as e:
+        print(f"Error updating {BLOCKED_WRITES_STAMP_PATH}: {e}")
+
+
+def _blocked_written_at():
+    """Time of the last write to a blocked calendar by any process (None if unknown)"""
+    try:
+        return os.stat(BLOCKED_WRITES_STAMP_PATH).st_mtime
+    except FileNotFoundError:
+        return 0.0
+    except OSError:
+        return None
+
+
+def _blocked_index(calendar_name):
+    """
+    {uid: content hash} of a blocked calendar, or None unless this process fetched it
+    recently and no process has written to the blocked calendars since (including this
+    one: its own writes are only trusted once a fetch has seen them). Rows from the warm
+    cache or a stale fallback are never trusted.
+    """
+    fetched_at = _feed_fetched_at.get(f"blocked_{calendar_name}")
+    if fetched_at is None or time.time() - fetched_at > BLOCKED_INDEX_MAX_AGE_SECONDS:
+        return None
+    written_at = _blocked_written_at()
+    if written_at is None or written_at >= fetched_at:
+        return None
+    entry = _feed_cache.get(f"blocked_{calendar_name}")
+    if not entry or entry.get('url_hash') != warm_cache.url_hash(BLOCKED_CALENDAR_URLS.get(calendar_name)):
+        return None
+    rows = entry['rows']
+    with _snapshot_lock:
+        cached = _blocked_hashes.get(calendar_name)
+        if cached is None or cached[0] is not rows:
+            index = {
+                uid: _blocked_content_hash(title, start, end, description)
+                for uid, title, start, end, _, description in rows
+            }
+            cached = (rows, index)
+            _blocked_hashes[calendar_name] = cached
+        return cached[1]
+
+
+def get_latest_snapshot():
+    """Return the most recent EventSnapshot, or None if no sync has run yet"""
+    return _latest_snapshot
+
+
+def load_warm_start():
+    """Load the snapshot and feed cache persisted by a previous process"""
+    global _latest_snapshot
+    load_start = time.time()
+    snapshot, feeds = warm_cache.load()
+    with _snapshot_lock:
+        if _latest_snapshot is None and snapshot is not None:
+            _latest_snapshot = snapshot
+        for feed, entry in feeds.items():
+            _feed_cache.setdefault(feed, entry)
+    if snapshot is not None or feeds:
+        print(f"Loaded warm cache: {len(snapshot or ())} events, {len(feeds)} feeds in {time.time() - load_start:.3f}s")
 
 
 def fetch_and_update_ics():
+    """Sync all calendars and return the events as a list of dicts"""
+    return sync_events().to_dicts()
+
+
+def sync_events():
     """
-    Fetch Google ICS from multiple calendars and sync into Event table.
+    Fetch Google ICS from multiple calendars and build an EventSnapshot.
     Also fetch blocked calendars to determine which events are already approved.
-    Uses concurrent requests for better performance.
+    Uses concurrent requests for better performance; each feed is parsed as soon
+    as its download completes (in a process pool when PARSE_WORKERS > 0).
+    If nothing changed since the previous sync, the previous snapshot (and its
+    already encoded response bytes) is returned.
     """
+    global _latest_snapshot
     start_time = time.time()
     now = datetime.now(timezone.utc)
     window_end = now + timedelta(days=SYNC_WINDOW_DAYS)
+    now_ts = int(now.timestamp())
+    window_end_ts = int(window_end.timestamp())
     
     # Fetch all buffers at once (not per-event)
     buffers_start = time.time()
@@ -193,7 +448,8 @@ def fetch_and_update_ics():
                 'type': 'blocked',
                 'source': source_name,
                 'other_calendar': other_calendar_name,
-                'url_id': url_id
+                'url_id': url_id,
+                'feed': f"blocked_{other_calendar_name}"
             }
     
     # Add main calendar URLs
@@ -201,108 +457,231 @@ def fetch_and_update_ics():
         urls_to_fetch.append(ics_url)
         url_info[ics_url] = {
             'type': 'main',
-            'source': source_name
+            'source': source_name,
+            'feed': source_name
         }
     
     # Add work calendar
     urls_to_fetch.append(APPROVED_CALENDAR_URL)
     url_info[APPROVED_CALENDAR_URL] = {
-        'type': 'work'
+        'type': 'work',
+        'feed': 'Work'
     }
     
-    # Fetch all URLs concurrently
+    # Fetch all URLs concurrently and start parsing each feed as soon as it arrives
     fetch_start = time.time()
-    results = {}
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        future_to_url = {executor.submit(_fetch_url, url): url for url in urls_to_fetch}
-        
-        for future in as_completed(future_to_url):
+    parse_pool = _get_parse_pool()
+    parse_futures = {}
+    parsed = {}  # Map URL to (parse_seconds, vevent_count, rows)
+    
+    parse_validators = {}  # Map URL to validators of the content being parsed
+    fresh_urls = set()  # Fetched (200 or 304) by this sync rather than served stale
+    stale_feeds = set()
+    
+    def cached_feed(url):
+        entry = _feed_cache.get(url_info[url]['feed'])
+        if entry and entry.get('url_hash') == warm_cache.url_hash(url):
+            return entry
+        return None
+    
+    def use_cached(url, reason):
+        # Serve the last good parsed result, flagged as stale
+        feed = url_info[url]['feed']
+        stale_feeds.add(feed)
+        metrics.FEED_STALE.inc(feed=feed, reason=reason)
+        entry = cached_feed(url)
+        if entry:
+            parsed[url] = (0.0, entry['vevent_count'], entry['rows'])
+    
+    def parse_args(url, content):
+        # Blocked calendars are parsed in full, main and work calendars without
+        # past events. Rows beyond the window are kept so cached rows stay valid
+        # while the window moves; the window is applied below.
+        if url_info[url]['type'] == 'blocked':
+            return (content,)
+        return (content, now_ts)
+    
+    def store_parsed(url, result):
+        parse_seconds, vevent_count, rows, malformed = result
+        if malformed:
+            print(f"Skipped {malformed} malformed events in {url_info[url]['feed']}")
+            metrics.FEED_ERRORS.inc(malformed, feed=url_info[url]['feed'], stage='parse')
+        parsed[url] = (parse_seconds, vevent_count, rows)
+    
+    def start_parse(url, content):
+        if parse_pool is not None:
+            parse_futures[url] = parse_pool.submit(_parse_feed, *parse_args(url, content))
+            return
+        try:
+            store_parsed(url, _parse_feed(*parse_args(url, content)))
+        except Exception as e:
+            print(f"Error parsing calendar {url_info[url]['feed']}: {e}")
+            metrics.FEED_ERRORS.inc(feed=url_info[url]['feed'], stage='parse')
+            use_cached(url, 'parse_error')
+    
+    def handle_result(url, result):
+        url, content, error, validators = result
+        feed = url_info[url]['feed']
+        if error:
+            print(f"Error fetching {url}: {error}")
+            _record_feed_failure(feed, error)
+            use_cached(url, 'error')
+            return
+        _record_feed_success(feed)
+        fresh_urls.add(url)
+        if content is None:
+            # 304 Not Modified: reuse the rows parsed last time
+            entry = cached_feed(url)
+            if entry:
+                parsed[url] = (0.0, entry['vevent_count'], entry['rows'])
+        elif content:
+            parse_validators[url] = validators
+            start_parse(url, content)
+    
+    def revalidate_late(url, future):
+        # A fetch that missed the deadline still refreshes the cache for the next sync
+        try:
+            url, content, error, validators = future.result()
+            feed = url_info[url]['feed']
+            if error:
+                _record_feed_failure(feed, error)
+                return
+            _record_feed_success(feed)
+            if content:
+                _, vevent_count, rows, _ = _parse_feed(*parse_args(url, content))
+                _store_feed_cache(feed, url, validators, vevent_count, rows)
+            if content is None or content:
+                _feed_fetched_at[feed] = fetch_start
+        except Exception as e:
+            print(f"Error revalidating {url}: {e}")
+    
+    # One thread per feed: the deadline runs from the start of the sync, so a
+    # feed queued behind others would miss it every time
+    executor = ThreadPoolExecutor(max_workers=max(len(urls_to_fetch), 1))
+    future_to_url = {}
+    for url in urls_to_fetch:
+        feed = url_info[url]['feed']
+        if not _feed_allowed(feed):
+            use_cached(url, 'circuit_open')
+            continue
+        future = executor.submit(_fetch_feed, url, feed=feed, validators=cached_feed(url))
+        future_to_url[future] = url
+    
+    def handle_future(future):
+        url = future_to_url[future]
+        try:
+            handle_result(url, future.result())
+        except Exception as e:
+            print(f"Exception fetching {url}: {e}")
+    
+    pending = set(future_to_url)
+    try:
+        for future in as_completed(future_to_url, timeout=SYNC_DEADLINE_SECONDS if SYNC_DEADLINE_SECONDS > 0 else None):
+            pending.discard(future)
+            handle_future(future)
+    except FuturesTimeoutError:
+        uncached = []
+        for future in pending:
             url = future_to_url[future]
-            try:
-                url, content, error = future.result()
-                if error:
-                    print(f"Error fetching {url}: {error}")
-                    results[url] = None
-                else:
-                    results[url] = content
-            except Exception as e:
-                print(f"Exception fetching {url}: {e}")
-                results[url] = None
+            if future.done():
+                # Finished while an earlier feed was being parsed
+                handle_future(future)
+            elif cached_feed(url) is None:
+                # Nothing to fall back on (cold start): wait for the fetch's own timeout
+                uncached.append(future)
+            else:
+                print(f"Fetching {url_info[url]['feed']} exceeded {SYNC_DEADLINE_SECONDS}s, serving last good result")
+                use_cached(url, 'timeout')
+                future.add_done_callback(lambda f, url=url: revalidate_late(url, f))
+        for future in as_completed(uncached):
+            handle_future(future)
+    finally:
+        executor.shutdown(wait=False)
     
     fetch_time = time.time() - fetch_start
     
-    # Build approved_events from blocked calendars
+    # Wait for any parses still running in the pool
     parse_start = time.time()
+    for url, future in parse_futures.items():
+        try:
+            store_parsed(url, future.result())
+        except Exception as e:
+            print(f"Error parsing calendar {url_info[url]['feed']}: {e}")
+            metrics.FEED_ERRORS.inc(feed=url_info[url]['feed'], stage='parse')
+            parse_validators.pop(url, None)
+            use_cached(url, 'parse_error')
+    
+    feeds_changed = False
+    for url, (parse_seconds, vevent_count, rows) in list(parsed.items()):
+        feed = url_info[url]['feed']
+        
+        if url in parse_validators:
+            if _store_feed_cache(feed, url, parse_validators[url], vevent_count, rows):
+                feeds_changed = True
+            metrics.FEED_PARSE_SECONDS.observe(parse_seconds, feed=feed)
+        
+        if url in fresh_urls and feed not in stale_feeds:
+            _feed_fetched_at[feed] = fetch_start
+        
+        if url_info[url]['type'] != 'blocked':
+            rows = [row for row in rows if now_ts <= row[2] <= window_end_ts]
+            parsed[url] = (parse_seconds, vevent_count, rows)
+        
+        metrics.FEED_VEVENTS.observe(vevent_count, feed=feed)
+        metrics.FEED_IN_WINDOW.observe(len(rows), feed=feed)
+    
+    # Build approved_events from blocked calendars: {source: {uid: (start, end)}}
     approved_events = {}
     for source_name in ICS_URLS.keys():
         approved_events[source_name] = {}
     
-    for url, content in results.items():
-        if content and url in url_info and url_info[url]['type'] == 'blocked':
+    for url, (_, _, rows) in parsed.items():
+        if url_info[url]['type'] == 'blocked':
             source = url_info[url]['source']
-            try:
-                blocked_dict = _parse_blocked_calendar(content, source)
-                approved_events[source].update(blocked_dict)
-            except Exception as e:
-                print(f"Error processing blocked calendar: {e}")
+            for uid, _, start, end, _, _ in rows:
+                if uid:
+                    approved_events[source][uid] = (start, end)
     
     # Process main calendars and work calendar
     all_events = []
     
-    for url, content in results.items():
-        if not content or url not in url_info:
-            continue
-        
+    for url, (_, _, rows) in parsed.items():
         info = url_info[url]
         
         if info['type'] == 'main':
-            events = _parse_calendar_events(content, info['source'], approved_events, now, window_end, buffers_cache)
-            all_events.extend(events)
+            all_events.extend(_classify_events(rows, info['source'], approved_events, buffers_cache))
         
         elif info['type'] == 'work':
-            try:
-                cal = Calendar.from_ical(content)
-                
-                for component in cal.walk():
-                    if component.name != "VEVENT":
-                        continue
-                    
-                    dtstart = component.get("dtstart").dt
-                    if isinstance(dtstart, datetime):
-                        dtstart = dtstart.astimezone(timezone.utc)
-                    else:
-                        dtstart = datetime.combine(dtstart, datetime.min.time(), tzinfo=timezone.utc)
-                        
-                    if dtstart < now or dtstart > window_end:
-                        continue
-                    
-                    dtend = component.get("dtend").dt if component.get("dtend") else dtstart
-                    if isinstance(dtend, datetime):
-                        dtend = dtend.astimezone(timezone.utc)
-                    else:
-                        dtend = datetime.combine(dtend, datetime.min.time(), tzinfo=timezone.utc)
-                    
-                    uid = str(component.get("uid", ""))
-                    
-                    all_events.append({
-                        "uid": uid,
-                        "source": "Work",
-                        "title": str(component.get("summary", "No Title")),
-                        "start": dtstart.isoformat(),
-                        "end": dtend.isoformat(),
-                        "location": str(component.get("location", "")),
-                        "description": str(component.get("description", "")),
-                        "status": "approved"
-                    })
-            except Exception as e:
-                print(f"Error fetching work calendar: {e}")
+            all_events.extend(_work_events(rows))
+    
+    all_events.sort()
+    
+    with _snapshot_lock:
+        if (_latest_snapshot is not None and _latest_snapshot.events == tuple(all_events)
+                and _latest_snapshot.stale_feeds == tuple(sorted(stale_feeds))):
+            snapshot = _latest_snapshot
+            snapshot_changed = False
+        else:
+            snapshot = EventSnapshot(all_events, stale_feeds=stale_feeds)
+            _latest_snapshot = snapshot
+            snapshot_changed = True
+    
+    if snapshot_changed or feeds_changed:
+        warm_cache.save_async(snapshot, dict(_feed_cache))
     
     parse_time = time.time() - parse_start
     total_time = time.time() - start_time
     
-    print(f"[PERF] fetch_and_update_ics: buffers={buffers_time:.2f}s, network_requests={fetch_time:.2f}s, parsing={parse_time:.2f}s, total={total_time:.2f}s ({len(all_events)} events)")
+    # "parsing" only covers what is left after the last download; per-feed parse
+    # times are in calmanage_feed_parse_seconds
+    metrics.SYNC_DURATION.observe(buffers_time, stage='buffers')
+    metrics.SYNC_DURATION.observe(fetch_time, stage='network')
+    metrics.SYNC_DURATION.observe(parse_time, stage='parsing')
+    metrics.SYNC_DURATION.observe(total_time, stage='total')
+    
+    _maybe_reconcile_async()
     
-    return all_events
+    return snapshot
 
 
 def approve_event(uid, source, start, end, title, description, use_generic_title, use_generic_description, buffer_before, buffer_after):
@@ -321,8 +700,13 @@ def approve_event(uid, source, start, end, title, description, use_generic_title
         buffer_before: Minutes to add before event
         buffer_after: Minutes to add after event
     
+    Blocked copies with the same times, title and description are not written
+    again, as long as this process fetched that blocked calendar recently and
+    nothing wrote to the blocked calendars since (see _blocked_index).
+    
     Returns:
-        dict with success status and message
+        dict with success status, message and per-calendar result
+        ('written', 'unchanged' or 'failed') in 'targets'
     """
     try:
         # Parse times
@@ -339,12 +723,22 @@ def approve_event(uid, source, start, end, title, description, use_generic_title
         event_title = "Busy" if use_generic_title else (title or "Event")
         event_description = "Blocked time" if use_generic_description else description
         
+        content_hash = _blocked_content_hash(event_title, _to_epoch(start_dt), _to_epoch(end_dt), event_description)
+        targets = {}
+        
         # Send blocked events to all OTHER calendars' blocked calendars
         for calendar_name in ICS_URLS.keys():
             if calendar_name == source:
                 # Don't send to own calendar
                 continue
             
+            # Skip the write if the blocked copy from the last sync is already identical
+            known = _blocked_index(calendar_name)
+            if known is not None and known.get(uid) == content_hash:
+                targets[calendar_name] = 'unchanged'
+                metrics.BLOCKED_WRITES.inc(calendar=calendar_name, result='unchanged')
+                continue
+            
             # Create blocked event
             cal = Calendar()
             cal.add('prodid', '-//CalManage//EN')
@@ -370,14 +764,28 @@ def approve_event(uid, source, start, end, title, description, use_generic_title
                     data=cal.to_ical(),
                     timeout=10
                 )
-                if not response.ok:
+                if response.ok:
+                    targets[calendar_name] = 'written'
+                else:
+                    targets[calendar_name] = 'failed'
                     print(f"Warning: Failed to send blocked event to {calendar_name}: {response.status_code}")
             except requests.RequestException as e:
+                targets[calendar_name] = 'failed'
                 print(f"Error sending blocked event to {calendar_name}: {e}")
+            metrics.BLOCKED_WRITES.inc(calendar=calendar_name, result=targets[calendar_name])
+        
+        if any(result != 'unchanged' for result in targets.values()):
+            _mark_blocked_written()
+        
+        if targets and all(result == 'unchanged' for result in targets.values()):
+            message = 'Event already blocked in other calendars, nothing to update'
+        else:
+            message = 'Event approved and blocked events sent to other calendars'
         
         return {
             'success': True,
-            'message': f'Event approved and blocked events sent to other calendars'
+            'message': message,
+            'targets': targets
         }
     
     except Exception as e:
@@ -411,6 +819,7 @@ def remove_approval(uid):
                     print(f"Warning: Failed to remove event from {calendar_name}: {response.status_code}")
             except requests.RequestException as e:
                 print(f"Error removing event from {calendar_name}: {e}")
+        _mark_blocked_written()
         
         return {
             'success': True,
@@ -423,3 +832,175 @@ def remove_approval(uid):
             'success': False,
             'message': f'Error removing approval: {str(e)}'
         }
+
+
+_reconcile_lock = threading.Lock()
+_last_reconcile = {'started_at': 0.0, 'report': None}
+
+
+def _find_orphaned_blocked(now_ts):
+    """
+    Compare the cached blocked feeds with the cached source feeds.
+    
+    Returns:
+        tuple (orphans, skipped) where orphans is {calendar_name: {uid: reason}} with
+        reason 'past' (already over) or 'missing' (no source event with that uid), and
+        skipped is {calendar_name: why} for blocked calendars that could not be checked
+    """
+    def skip_all(why):
+        return {}, {calendar_name: why for calendar_name in BLOCKED_CALENDAR_URLS}
+    
+    snapshot = _latest_snapshot
+    stale = set(snapshot.stale_feeds) if snapshot is not None else set()
+    
+    # Every source and blocked feed must have been fetched by this process in the same
+    # recent sync. Otherwise a missing uid may only mean a failed fetch, rows from the
+    # warm cache, or a source fetched before an event appeared that was approved since.
+    feeds = list(ICS_URLS) + [f"blocked_{calendar_name}" for calendar_name in BLOCKED_CALENDAR_URLS]
+    fetched = {feed: _feed_fetched_at.get(feed) for feed in feeds}
+    not_fresh = sorted(feed for feed, fetched_at in fetched.items() if fetched_at is None or feed in stale)
+    if not_fresh:
+        return skip_all(f"{', '.join(not_fresh)} not freshly fetched by this process")
+    if len(set(fetched.values())) != 1:
+        return skip_all('feeds were not all fetched by the same sync')
+    fetched_at = next(iter(fetched.values()))
+    if time.time() - fetched_at > BLOCKED_INDEX_MAX_AGE_SECONDS:
+        return skip_all('last complete sync is too old')
+    written_at = _blocked_written_at()
+    if written_at is None or written_at >= fetched_at:
+        return skip_all('blocked calendars changed since the last sync')
+    
+    source_uids = set()
+    for source_name, ics_url in ICS_URLS.items():
+        entry = _feed_cache.get(source_name)
+        if not entry or entry.get('url_hash') != warm_cache.url_hash(ics_url):
+            return skip_all(f'source {source_name} not synced')
+        if not entry['vevent_count']:
+            return skip_all(f'source {source_name} is empty')
+        source_uids.update(row[0] for row in entry['rows'])
+    
+    orphans = {}
+    skipped = {}
+    for calendar_name, blocked_url in BLOCKED_CALENDAR_URLS.items():
+        feed = f"blocked_{calendar_name}"
+        entry = _feed_cache.get(feed)
+        if not entry or entry.get('url_hash') != warm_cache.url_hash(blocked_url):
+            skipped[calendar_name] = 'blocked calendar not synced'
+            continue
+        
+        found = {}
+        for uid, _, start, end, _, _ in entry['rows']:
+            if not uid:
+                continue
+            if end < now_ts:
+                found[uid] = 'past'
+            elif start >= now_ts and uid not in source_uids:
+                # Ongoing events are kept: source feeds are parsed without events that already started
+                found[uid] = 'missing'
+        orphans[calendar_name] = found
+    
+    return orphans, skipped
+
+
+def _delete_blocked(session, blocked_url, uid):
+    """Delete one blocked event; returns True if it is gone"""
+    try:
+        response = session.delete(f"{blocked_url}{uid}.ics", timeout=10)
+        return response.ok or response.status_code == 404
+    except requests.RequestException as e:
+        print(f"Error deleting orphaned blocked event {uid}: {e}")
+        return False
+
+
+def reconcile_blocked_calendars(dry_run=None):
+    """
+    Find blocked events whose source event no longer exists (or that are over)
+    and delete them in concurrent batches.
+    
+    Args:
+        dry_run: Only report what would be deleted (default: BLOCKED_RECONCILE_MODE != 'delete')
+    
+    Returns:
+        dict report with per-calendar counts and uids
+    """
+    if dry_run is None:
+        dry_run = BLOCKED_RECONCILE_MODE != 'delete'
+    
+    reconcile_start = time.time()
+    orphans, skipped = _find_orphaned_blocked(int(reconcile_start))
+    report = {
+        'dry_run': dry_run,
+        'started_at': reconcile_start,
+        'calendars': {},
+        'skipped': skipped
+    }
+    
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=BLOCKED_RECONCILE_WORKERS) as executor:
+        for calendar_name, found in orphans.items():
+            blocked_url = BLOCKED_CALENDAR_URLS[calendar_name]
+            result = {
+                'past': sum(1 for reason in found.values() if reason == 'past'),
+                'missing': sum(1 for reason in found.values() if reason == 'missing'),
+                'deleted': 0,
+                'failed': 0,
+                'uids': sorted(found)
+            }
+            report['calendars'][calendar_name] = result
+            if dry_run or not found:
+                continue
+            
+            uids = sorted(found)
+            for i in range(0, len(uids), BLOCKED_RECONCILE_BATCH_SIZE):
+                batch = uids[i:i + BLOCKED_RECONCILE_BATCH_SIZE]
+                outcomes = executor.map(lambda uid: _delete_blocked(session, blocked_url, uid), batch)
+                for uid, deleted in zip(batch, outcomes):
+                    if deleted:
+                        result['deleted'] += 1
+                    else:
+                        result['failed'] += 1
+                    metrics.BLOCKED_RECONCILED.inc(
+                        calendar=calendar_name, reason=found[uid], result='deleted' if deleted else 'failed'
+                    )
+    
+    if not dry_run and any(result['deleted'] or result['failed'] for result in report['calendars'].values()):
+        _mark_blocked_written()
+    
+    report['seconds'] = time.time() - reconcile_start
+    _last_reconcile['report'] = report
+    
+    for calendar_name, result in report['calendars'].items():
+        if result['past'] or result['missing']:
+            action = 'would delete' if dry_run else f"deleted {result['deleted']}, failed {result['failed']} of"
+            print(f"Blocked calendar {calendar_name}: {action} {result['past']} past and "
+                  f"{result['missing']} orphaned events ({report['seconds']:.2f}s)")
+    return report
+
+
+def _reconcile_worker():
+    try:
+        reconcile_blocked_calendars()
+    except Exception as e:
+        print(f"Error reconciling blocked calendars: {e}")
+    finally:
+        _reconcile_lock.release()
+
+
+def _maybe_reconcile_async():
+    """Start a background reconcile pass if one is due and none is running"""
+    if BLOCKED_RECONCILE_MODE == 'off':
+        return
+    # Like the workscrape scheduler, only the elected process runs background jobs,
+    # so gunicorn workers don't each send their own delete batches
+    if not jobs.election.try_acquire():
+        return
+    if time.time() - _last_reconcile['started_at'] < BLOCKED_RECONCILE_INTERVAL_SECONDS:
+        return
+    if not _reconcile_lock.acquire(blocking=False):
+        return
+    _last_reconcile['started_at'] = time.time()
+    threading.Thread(target=_reconcile_worker, daemon=True).start()
+
+
+def get_reconcile_report():
+    """Report of the last reconcile pass, or None if none has run"""
+    return _last_reconcile['report']
@@ -0,0 +1,309 @@
+import fcntl
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from dotenv import load_dotenv
+import metrics
+
+load_dotenv()
+
+DATABASE = os.getenv('DATABASE_PATH', 'calmanage.db')
+SCHEDULER_LOCK_PATH = os.getenv('SCHEDULER_LOCK_PATH') or f"{DATABASE}.scheduler.lock"
+WORKSCRAPE_SCRIPT = Path(__file__).resolve().parent.parent / 'workscrape.py'
+WORKSCRAPE_INTERVAL_SECONDS = 3600  # 1 hour
+SCHEDULER_POLL_SECONDS = 30  # How often non-leaders retry the election and the leader checks for due jobs
+# The first scrape after startup waits this long plus up to WORKSCRAPE_STARTUP_JITTER seconds,
+# so restarts do not launch a browser while the app is booting
+WORKSCRAPE_STARTUP_DELAY = int(os.getenv('WORKSCRAPE_STARTUP_DELAY', '120'))
+WORKSCRAPE_STARTUP_JITTER = int(os.getenv('WORKSCRAPE_STARTUP_JITTER', '180'))
+MAX_LOG_LINES = 1000
+KEEP_RUNS = 10  # Older runs and their logs are pruned
+
+
+def _connect():
+    conn = sqlite3.connect(DATABASE, timeout=10)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_job_tables():
+    """Create the shared job state tables (every worker reads these)"""
+    conn = _connect()
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS workscrape_runs (
+            id INTEGER PRIMARY KEY,
+            owner_pid INTEGER NOT NULL,
+            owner_start INTEGER,
+            started_at TEXT NOT NULL,
+            started_ts REAL NOT NULL,
+            finished_at TEXT,
+            return_code INTEGER
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS workscrape_log (
+            id INTEGER PRIMARY KEY,
+            run_id INTEGER NOT NULL,
+            line TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS workscrape_log_run ON workscrape_log (run_id, id)')
+
+    conn.commit()
+    conn.close()
+
+
+def _utc_now():
+    return datetime.utcnow().isoformat() + 'Z'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def _process_start_time(pid):
+    """Start time of a process in clock ticks since boot, or None where /proc is unavailable"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            stat = f.read()
+        # Fields after the command name, which may itself contain spaces; starttime is field 22
+        return int(stat.rsplit(')', 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _owner_alive(pid, start):
+    """
+    True if the process that claimed a run is still running. PIDs are reused (in a
+    restarted container they start from the same small numbers), so the pid must
+    also still belong to a process with the recorded start time.
+    """
+    if not _pid_alive(pid):
+        return False
+    current = _process_start_time(pid)
+    if current is None:
+        # No /proc to tell processes apart; fall back to the pid alone
+        return True
+    return current == start
+
+
+def _append_log(conn, run_id, lines):
+    conn.executemany('INSERT INTO workscrape_log (run_id, line) VALUES (?, ?)',
+                     [(run_id, line.rstrip()) for line in lines])
+    conn.commit()
+
+
+def _finish_run(conn, run_id, return_code):
+    conn.execute('UPDATE workscrape_runs SET finished_at = ?, return_code = ? WHERE id = ?',
+                 (_utc_now(), return_code, run_id))
+    conn.commit()
+
+
+def _claim_run():
+    """
+    Atomically register a new run unless one is already active.
+    Returns the new run id, or None if a run is in progress in some worker.
+    """
+    conn = _connect()
+    conn.isolation_level = None
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        active = conn.execute(
+            'SELECT id, owner_pid, owner_start FROM workscrape_runs WHERE finished_at IS NULL ORDER BY id DESC'
+        ).fetchall()
+        for row in active:
+            if _owner_alive(row['owner_pid'], row['owner_start']):
+                conn.execute('ROLLBACK')
+                return None
+            # The process that owned this run died (or an earlier boot's process had
+            # the same pid), so it can never be finished normally
+            conn.execute('UPDATE workscrape_runs SET finished_at = ?, return_code = -1 WHERE id = ?',
+                         (_utc_now(), row['id']))
+
+        cursor = conn.execute(
+            'INSERT INTO workscrape_runs (owner_pid, owner_start, started_at, started_ts) VALUES (?, ?, ?, ?)',
+            (os.getpid(), _process_start_time(os.getpid()), _utc_now(), time.time())
+        )
+        run_id = cursor.lastrowid
+        conn.execute('DELETE FROM workscrape_log WHERE run_id <= ?', (run_id - KEEP_RUNS,))
+        conn.execute('DELETE FROM workscrape_runs WHERE id <= ?', (run_id - KEEP_RUNS,))
+        conn.execute('COMMIT')
+        return run_id
+    except Exception:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+
+def run_workscrape():
+    """
+    Start workscrape.py in this process unless a run is already active in any worker.
+    Returns True if a run was started.
+    """
+    if not WORKSCRAPE_SCRIPT.exists():
+        return False
+
+    run_id = _claim_run()
+    if run_id is None:
+        return False
+
+    env = os.environ.copy()
+    env['PYTHONUNBUFFERED'] = '1'
+
+    conn = _connect()
+    try:
+        _append_log(conn, run_id, ['Starting workscrape.py...'])
+        process = subprocess.Popen(
+            [sys.executable, '-u', str(WORKSCRAPE_SCRIPT)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            cwd=str(WORKSCRAPE_SCRIPT.parent),
+            env=env
+        )
+    except Exception as e:
+        _append_log(conn, run_id, [f'Failed to start workscrape.py: {e}'])
+        _finish_run(conn, run_id, -1)
+        raise
+    finally:
+        conn.close()
+
+    reader_thread = threading.Thread(target=_workscrape_reader, args=(process, run_id), daemon=True)
+    reader_thread.start()
+    return True
+
+
+def _workscrape_reader(proc, run_id):
+    run_start = time.monotonic()
+    conn = _connect()
+    pending = []
+    last_flush = time.monotonic()
+
+    if proc.stdout:
+        for line in iter(proc.stdout.readline, ''):
+            if not line:
+                break
+            pending.append(line)
+            # Batch log writes so a chatty scrape does not commit per line
+            if len(pending) >= 50 or time.monotonic() - last_flush > 0.5:
+                _append_log(conn, run_id, pending)
+                pending = []
+                last_flush = time.monotonic()
+
+    proc.wait()
+
+    if proc.returncode == 0:
+        pending.append('workscrape.py finished successfully.')
+    else:
+        pending.append(f'workscrape.py exited with code {proc.returncode}.')
+    _append_log(conn, run_id, pending)
+    _finish_run(conn, run_id, proc.returncode)
+    conn.close()
+
+    metrics.WORKSCRAPE_SECONDS.observe(
+        time.monotonic() - run_start,
+        result='success' if proc.returncode == 0 else 'failure'
+    )
+
+
+def get_workscrape_status():
+    """Status and recent output of the latest run, as seen by any worker"""
+    conn = _connect()
+    try:
+        run = conn.execute('SELECT * FROM workscrape_runs ORDER BY id DESC LIMIT 1').fetchone()
+        if run is None:
+            return {'running': False, 'output': [], 'started_at': None, 'finished_at': None, 'return_code': None}
+
+        rows = conn.execute(
+            'SELECT line FROM workscrape_log WHERE run_id = ? ORDER BY id DESC LIMIT ?',
+            (run['id'], MAX_LOG_LINES)
+        ).fetchall()
+        return {
+            'running': run['finished_at'] is None and _owner_alive(run['owner_pid'], run['owner_start']),
+            'output': [row['line'] for row in reversed(rows)],
+            'started_at': run['started_at'],
+            'finished_at': run['finished_at'],
+            'return_code': run['return_code']
+        }
+    finally:
+        conn.close()
+
+
+def _last_run_started_ts():
+    conn = _connect()
+    try:
+        row = conn.execute('SELECT MAX(started_ts) AS ts FROM workscrape_runs').fetchone()
+        return row['ts']
+    finally:
+        conn.close()
+
+
+class LeaderElection:
+    """
+    Elects one process (per lock file) to run background jobs, using an exclusive
+    flock. The OS releases the lock when the leader exits, so another worker takes over.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    @property
+    def is_leader(self):
+        return self._fd is not None
+
+    def try_acquire(self):
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+
+election = LeaderElection(SCHEDULER_LOCK_PATH)
+
+
+def _scheduler_loop():
+    not_before = time.time() + WORKSCRAPE_STARTUP_DELAY + random.uniform(0, WORKSCRAPE_STARTUP_JITTER)
+    while True:
+        try:
+            if election.try_acquire() and time.time() >= not_before:
+                # Due-ness comes from shared state, so a new leader does not re-run a fresh scrape
+                last_started = _last_run_started_ts()
+                if last_started is None or time.time() - last_started >= WORKSCRAPE_INTERVAL_SECONDS:
+                    run_workscrape()
+        except Exception as e:
+            print(f"Error in workscrape scheduler: {e}")
+        time.sleep(SCHEDULER_POLL_SECONDS)
+
+
+def start_scheduler():
+    """Start the scheduler thread; only the elected process actually runs jobs"""
+    thread = threading.Thread(target=_scheduler_loop, daemon=True)
+    thread.start()
+    return thread
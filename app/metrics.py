@@ -0,0 +1,295 @@
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+# When set, every process writes its metrics to a file in this directory and
+# /api/metrics renders the sum over all files, so any gunicorn worker can answer
+# a scrape. The directory must be emptied when the server starts (gunicorn.conf.py).
+METRICS_DIR = os.getenv('METRICS_DIR')
+METRICS_FLUSH_SECONDS = 5
+
+# Default buckets (seconds) for latency histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Buckets for byte sizes (1KB .. 16MB)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+# Buckets for event counts
+COUNT_BUCKETS = (0, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Buckets for long running jobs such as workscrape (seconds)
+JOB_BUCKETS = (5, 10, 30, 60, 120, 300, 600, 1200)
+
+_registry_lock = threading.Lock()
+_registry = []
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def merge(total, values):
+        for key, value in values.items():
+            total[key] = total.get(key, 0) + value
+
+    def render(self, values=None):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        if values is None:
+            values = self.snapshot()
+        for key, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    """Cumulative histogram with optional labels"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values = {}  # {label values: [bucket counts..., sum, count]}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [0] * (len(self.buckets) + 2)
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(state) for key, state in self._values.items()}
+
+    @staticmethod
+    def merge(total, values):
+        for key, state in values.items():
+            if key in total:
+                total[key] = [a + b for a, b in zip(total[key], state)]
+            else:
+                total[key] = list(state)
+
+    def render(self, values=None):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        if values is None:
+            values = self.snapshot()
+        for key, state in sorted(values.items()):
+            for i, bound in enumerate(self.buckets):
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(float(bound))))
+                lines.append(f'{self.name}_bucket{labels} {state[i]}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(float(state[-2]))}')
+            lines.append(f'{self.name}_count{labels} {state[-1]}')
+        return lines
+
+
+def _register(metric):
+    with _registry_lock:
+        _registry.append(metric)
+
+
+# One file per process lifetime (pid alone is reused), so a restarted worker
+# never overwrites the totals of the worker it replaced. Set by start_multiprocess_flush.
+_process_file = None
+_write_lock = threading.Lock()
+
+
+def _write_process_file():
+    with _registry_lock:
+        metrics = list(_registry)
+    # Serialized: the flush thread and concurrent scrapes all write this file
+    with _write_lock:
+        data = {metric.name: [[list(key), value] for key, value in metric.snapshot().items()] for metric in metrics}
+        fd, tmp_path = tempfile.mkstemp(dir=METRICS_DIR, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            # Atomic, so readers in other workers never see a half-written file
+            os.replace(tmp_path, _process_file)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            _write_process_file()
+        except Exception as e:
+            print(f"Error writing metrics file: {e}")
+
+
+def start_multiprocess_flush():
+    """Periodically write this process's metrics to METRICS_DIR (no-op when unset)"""
+    global _process_file
+    if not METRICS_DIR or _process_file is not None:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    _process_file = os.path.join(METRICS_DIR, f"{os.getpid()}-{int(time.time() * 1000)}.json")
+    _write_process_file()
+    threading.Thread(target=_flush_loop, daemon=True).start()
+
+
+def _merged_values(metrics):
+    """Sum every process file in METRICS_DIR: {metric name: {label values: value}}"""
+    merged = {metric.name: {} for metric in metrics}
+    by_name = {metric.name: metric for metric in metrics}
+    if _process_file is not None:
+        _write_process_file()
+    else:
+        # Not flushing (e.g. a script importing the app): count this process from memory
+        for metric in metrics:
+            metric.merge(merged[metric.name], metric.snapshot())
+    for filename in os.listdir(METRICS_DIR):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, filename)) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading metrics file {filename}: {e}")
+            continue
+        for name, items in data.items():
+            if name in by_name:
+                by_name[name].merge(merged[name], {tuple(key): value for key, value in items})
+    return merged
+
+
+def render_metrics():
+    """Render all registered metrics (of all processes when METRICS_DIR is set) in Prometheus text format"""
+    with _registry_lock:
+        metrics = list(_registry)
+    merged = _merged_values(metrics) if METRICS_DIR else {}
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render(merged.get(metric.name)))
+    return '\n'.join(lines) + '\n'
+
+
+# Sync pipeline
+SYNC_DURATION = Histogram(
+    'calmanage_sync_stage_seconds',
+    'Duration of each fetch_and_update_ics stage',
+    ['stage']
+)
+FEED_FETCH_SECONDS = Histogram(
+    'calmanage_feed_fetch_seconds',
+    'Time spent downloading a calendar feed',
+    ['feed']
+)
+FEED_BYTES = Histogram(
+    'calmanage_feed_bytes',
+    'Size of downloaded calendar feeds in bytes',
+    ['feed'],
+    buckets=SIZE_BUCKETS
+)
+FEED_PARSE_SECONDS = Histogram(
+    'calmanage_feed_parse_seconds',
+    'Time spent parsing a calendar feed',
+    ['feed']
+)
+FEED_VEVENTS = Histogram(
+    'calmanage_feed_vevents',
+    'Number of VEVENT components in a calendar feed',
+    ['feed'],
+    buckets=COUNT_BUCKETS
+)
+FEED_IN_WINDOW = Histogram(
+    'calmanage_feed_in_window_events',
+    'Number of events from a calendar feed inside the sync window',
+    ['feed'],
+    buckets=COUNT_BUCKETS
+)
+FEED_ERRORS = Counter(
+    'calmanage_feed_errors_total',
+    'Errors while fetching or parsing a calendar feed',
+    ['feed', 'stage']
+)
+FEED_STALE = Counter(
+    'calmanage_feed_stale_total',
+    'Syncs that served the last good result of a feed instead of fresh data',
+    ['feed', 'reason']
+)
+FEED_HEDGED = Counter(
+    'calmanage_feed_hedged_total',
+    'Hedged second requests sent for slow feeds',
+    ['feed']
+)
+
+# Approvals
+BLOCKED_WRITES = Counter(
+    'calmanage_blocked_writes_total',
+    'Blocked event writes per target calendar (written, unchanged or failed)',
+    ['calendar', 'result']
+)
+BLOCKED_RECONCILED = Counter(
+    'calmanage_blocked_reconciled_total',
+    'Orphaned blocked events removed by the reconciler',
+    ['calendar', 'reason', 'result']
+)
+
+# HTTP
+ROUTE_SECONDS = Histogram(
+    'calmanage_http_request_seconds',
+    'Latency of HTTP requests per route',
+    ['method', 'route', 'status']
+)
+
+# Background jobs
+WORKSCRAPE_SECONDS = Histogram(
+    'calmanage_workscrape_run_seconds',
+    'Duration of workscrape.py runs',
+    ['result'],
+    buckets=JOB_BUCKETS
+)
@@ -0,0 +1,126 @@
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+PROFILE_DIR = os.getenv('PROFILE_DIR') or os.path.join(
+    os.path.dirname(os.getenv('DATABASE_PATH', 'calmanage.db')) or '.', 'profiles'
+)
+PROFILE_MAX_ENTRIES = int(os.getenv('PROFILE_MAX_ENTRIES', '20'))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.001'))
+
+_ring_lock = threading.Lock()
+
+
+class _StackSampler(threading.Thread):
+    """Periodically samples the stack of one thread and counts collapsed stacks"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class ProfileSession:
+    """Profiles the current thread with cProfile and a stack sampler"""
+
+    def __init__(self, label):
+        self.label = label
+        self.started_at = datetime.utcnow()
+        self._start = time.perf_counter()
+        self._profiler = cProfile.Profile()
+        self._sampler = _StackSampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL)
+        self._sampler.start()
+        self._profiler.enable()
+
+    def stop(self):
+        """Stop profiling, write the profile to the ring and return its metadata"""
+        self._profiler.disable()
+        self._sampler.stop()
+        duration = time.perf_counter() - self._start
+
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', self.label).strip('_') or 'request'
+        name = f"{self.started_at.strftime('%Y%m%dT%H%M%S%f')}_{slug}"
+
+        with _ring_lock:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            self._profiler.dump_stats(os.path.join(PROFILE_DIR, f"{name}.pstats"))
+            with open(os.path.join(PROFILE_DIR, f"{name}.collapsed"), 'w') as f:
+                for stack, count in self._sampler.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            _trim_ring()
+
+        return {
+            'name': name,
+            'label': self.label,
+            'duration': round(duration, 4),
+            'samples': sum(self._sampler.stacks.values())
+        }
+
+
+def _trim_ring():
+    """Delete the oldest profiles so at most PROFILE_MAX_ENTRIES remain"""
+    names = sorted({os.path.splitext(f)[0] for f in os.listdir(PROFILE_DIR)
+                    if f.endswith(('.pstats', '.collapsed'))})
+    for name in names[:-PROFILE_MAX_ENTRIES] if PROFILE_MAX_ENTRIES > 0 else names:
+        for ext in ('.pstats', '.collapsed'):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, name + ext))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles():
+    """List saved profiles, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+
+    profiles = []
+    with _ring_lock:
+        names = sorted({os.path.splitext(f)[0] for f in os.listdir(PROFILE_DIR)
+                        if f.endswith('.pstats')}, reverse=True)
+        for name in names:
+            pstats_path = os.path.join(PROFILE_DIR, f"{name}.pstats")
+            try:
+                stats = pstats.Stats(pstats_path)
+                total = stats.total_tt
+            except Exception:
+                total = None
+            profiles.append({
+                'name': name,
+                'total_time': round(total, 4) if total is not None else None,
+                'files': [f for f in (f"{name}.pstats", f"{name}.collapsed")
+                          if os.path.exists(os.path.join(PROFILE_DIR, f))]
+            })
+    return profiles
+
+
+def profile_path(filename):
+    """Return the path of a saved profile file, or None if it does not exist"""
+    if os.path.basename(filename) != filename or not filename.endswith(('.pstats', '.collapsed')):
+        return None
+    path = os.path.join(PROFILE_DIR, filename)
+    return path if os.path.exists(path) else None
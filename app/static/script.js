@@ -147,23 +147,53 @@ async function pollWorkscrapeStatus() {
     }
 }
 
-async function loadInitialData() {
-    // Load init data first (very fast - database only, ~0.01s)
+function readInitialState() {
+    // State rendered into index.html by the server (settings + latest cached events)
+    const el = document.getElementById('initialState');
+    if (!el) return {};
     try {
-        const initRes = await fetch('/api/init');
-        const initData = await initRes.json();
-
-        buffers = initData.buffers || {};
-        privacySettings = initData.privacy || {};
-        const ignoredArray = initData.ignored || [];
-        ignoredEvents = new Set(ignoredArray);
+        return JSON.parse(el.textContent) || {};
     } catch (error) {
-        console.error('Error loading init data:', error);
+        console.error('Error reading initial state:', error);
+        return {};
+    }
+}
+
+function applySettings(initData) {
+    buffers = initData.buffers || {};
+    privacySettings = initData.privacy || {};
+    const ignoredArray = initData.ignored || [];
+    ignoredEvents = new Set(ignoredArray);
+}
+
+async function loadInitialData() {
+    const initialState = readInitialState();
+
+    if (initialState.settings) {
+        applySettings(initialState.settings);
+    } else {
+        // Load init data first (very fast - database only, ~0.01s)
+        try {
+            const initRes = await fetch('/api/init');
+            applySettings(await initRes.json());
+        } catch (error) {
+            console.error('Error loading init data:', error);
+        }
+    }
+
+    // Paint the embedded snapshot right away, then only refetch events if they changed
+    const headers = {};
+    if (initialState.events) {
+        loadPendingEvents(initialState.events);
+        if (initialState.eventsEtag) {
+            headers['If-None-Match'] = initialState.eventsEtag;
+        }
     }
 
-    // Then load pending events (with correct state already populated)
     try {
-        const eventsRes = await fetch('/api/pending_events');
+        const eventsRes = await fetch('/api/pending_events', { headers });
+        notifyStaleFeeds(eventsRes);
+        if (eventsRes.status === 304) return;
         const eventsData = await eventsRes.json();
         loadPendingEvents(eventsData);
     } catch (error) {
@@ -239,6 +269,7 @@ async function loadPendingEvents(eventsData = null) {
         // If eventsData is not provided, fetch it
         if (!eventsData) {
             const response = await fetch('/api/pending_events');
+            notifyStaleFeeds(response);
             eventsData = await response.json();
         }
 
@@ -624,6 +655,7 @@ async function approveEvent() {
         });
 
         if (response.ok) {
+            const result = await response.json();
             // If this was a previously ignored event, remove it from the ignored list
             if (wasIgnored) {
                 ignoredEvents.delete(currentEvent.id);
@@ -633,7 +665,12 @@ async function approveEvent() {
                     headers: { 'Content-Type': 'application/json' }
                 });
             }
-            showNotification('Event approved!', 'success');
+            const targets = Object.values(result.targets || {});
+            if (targets.length && targets.every(target => target === 'unchanged')) {
+                showNotification('Event already approved, nothing changed', 'success');
+            } else {
+                showNotification('Event approved!', 'success');
+            }
             closeEventDetail();
             // Reload events after all operations complete
             await loadPendingEvents();
@@ -693,6 +730,14 @@ async function ignoreEvent() {
     }
 }
 
+function notifyStaleFeeds(response) {
+    // Set when some calendars could not be fetched and their last good copy is shown
+    const staleFeeds = response.headers.get('X-Stale-Feeds');
+    if (staleFeeds) {
+        showNotification(`Showing cached data for: ${staleFeeds.split(',').join(', ')}`, 'error');
+    }
+}
+
 function showNotification(message, type = 'success') {
     const notification = document.createElement('div');
     notification.className = `notification ${type}`;
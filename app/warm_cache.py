@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from events import EventRecord, EventSnapshot, encode_json
+
+DATABASE = os.getenv('DATABASE_PATH', 'calmanage.db')
+WARM_CACHE_PATH = os.getenv('WARM_CACHE_PATH') or f"{DATABASE}.cache.json"
+WARM_CACHE_FORMAT = 1
+
+_save_lock = threading.Lock()
+
+
+def url_hash(url):
+    """Feeds are stored under their name plus a hash of the URL, never the (secret) URL itself"""
+    return hashlib.sha256((url or '').encode('utf-8')).hexdigest()[:16]
+
+
+def load():
+    """
+    Load the persisted snapshot and feed cache.
+
+    Returns:
+        tuple (snapshot or None, {feed: cache entry}); both empty if the file is
+        missing, unreadable or from another format version
+    """
+    try:
+        with open(WARM_CACHE_PATH, 'rb') as f:
+            data = json.loads(f.read())
+    except FileNotFoundError:
+        return None, {}
+    except Exception as e:
+        print(f"Error loading warm cache {WARM_CACHE_PATH}: {e}")
+        return None, {}
+
+    if data.get('format') != WARM_CACHE_FORMAT:
+        return None, {}
+
+    snapshot = None
+    if data.get('snapshot'):
+        snapshot = EventSnapshot(
+            [EventRecord(*event) for event in data['snapshot']['events']],
+            created_at=data['snapshot'].get('created_at')
+        )
+
+    feeds = {}
+    for feed, entry in (data.get('feeds') or {}).items():
+        entry['rows'] = [tuple(row) for row in entry.get('rows', [])]
+        feeds[feed] = entry
+
+    return snapshot, feeds
+
+
+def _write(payload):
+    tmp_path = f"{WARM_CACHE_PATH}.{os.getpid()}.tmp"
+    with _save_lock:
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(encode_json(payload))
+            # Atomic replace, so concurrent workers and crashes never leave a torn file
+            os.replace(tmp_path, WARM_CACHE_PATH)
+        except Exception as e:
+            print(f"Error saving warm cache {WARM_CACHE_PATH}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def save_async(snapshot, feeds):
+    """Persist the snapshot and feed cache in the background"""
+    payload = {
+        'format': WARM_CACHE_FORMAT,
+        'saved_at': time.time(),
+        'snapshot': {
+            'created_at': snapshot.created_at,
+            'events': [list(event) for event in snapshot.events]
+        } if snapshot is not None else None,
+        'feeds': {
+            feed: dict(entry, rows=[list(row) for row in entry['rows']])
+            for feed, entry in feeds.items()
+        }
+    }
+    threading.Thread(target=_write, args=(payload,), daemon=True).start()
@@ -0,0 +1,118 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+RRULES = (
+    "FREQ=DAILY;COUNT=10",
+    "FREQ=WEEKLY;BYDAY=MO,WE,FR",
+    "FREQ=WEEKLY;INTERVAL=2;UNTIL=20991231T000000Z",
+    "FREQ=MONTHLY;BYMONTHDAY=15",
+)
+
+WORDS = ("meeting", "dinner", "school", "training", "doctor", "birthday", "call", "trip", "party", "review")
+
+
+def _fmt(dt):
+    return dt.strftime("%Y%m%dT%H%M%SZ")
+
+
+def _fold(line):
+    """Fold a content line at 75 octets as required by RFC 5545"""
+    if len(line) <= 75:
+        return line
+    parts = [line[:75]]
+    line = line[75:]
+    while line:
+        parts.append(" " + line[:74])
+        line = line[74:]
+    return "\r\n".join(parts)
+
+
+def generate_vevent(uid, start, end, summary, description="", rrule=None, dtstamp=None):
+    """Return the lines of a single VEVENT"""
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{_fmt(dtstamp or start)}",
+        f"DTSTART:{_fmt(start)}",
+        f"DTEND:{_fmt(end)}",
+        f"SUMMARY:{summary}",
+    ]
+    if description:
+        lines.append(f"DESCRIPTION:{description}")
+    if rrule:
+        lines.append(f"RRULE:{rrule}")
+    lines.append("END:VEVENT")
+    return lines
+
+
+def wrap_calendar(vevent_lines, name="Synthetic"):
+    """Wrap VEVENT lines into a VCALENDAR document (bytes)"""
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//CalManage//Bench//EN",
+        f"X-WR-CALNAME:{name}",
+    ]
+    lines.extend(vevent_lines)
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(_fold(line) for line in lines) + "\r\n").encode("utf-8")
+
+
+def generate_events(name, event_count, recurrence_density=0.1, history_days=365, window_days=90,
+                    description_length=200, seed=0, now=None):
+    """
+    Generate synthetic events for one calendar.
+
+    Args:
+        name: Calendar name, used in uids and titles
+        event_count: Total number of events
+        recurrence_density: Fraction of events carrying an RRULE
+        history_days: How far into the past events are spread
+        window_days: How far into the future events are spread
+        description_length: Approximate description length in characters
+        seed: Random seed, so runs are reproducible
+
+    Returns:
+        list of dicts with uid, start, end, summary, description and rrule
+    """
+    rng = random.Random(f"{name}-{seed}")
+    now = (now or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0)
+    total_hours = (history_days + window_days) * 24
+
+    events = []
+    for i in range(event_count):
+        start = now - timedelta(days=history_days) + timedelta(hours=rng.randrange(max(total_hours, 1)))
+        end = start + timedelta(minutes=rng.choice((30, 60, 90, 120, 240)))
+        words = [rng.choice(WORDS) for _ in range(max(description_length // 8, 0))]
+        events.append({
+            "uid": f"{name.lower()}-{seed}-{i}@bench.calmanage",
+            "start": start,
+            "end": end,
+            "summary": f"{rng.choice(WORDS).title()} {i}",
+            "description": " ".join(words),
+            "rrule": rng.choice(RRULES) if rng.random() < recurrence_density else None,
+        })
+    return events
+
+
+def events_to_ics(events, name="Synthetic"):
+    """Serialize generated events into ICS bytes"""
+    lines = []
+    for event in events:
+        lines.extend(generate_vevent(
+            event["uid"], event["start"], event["end"], event["summary"],
+            event["description"], event["rrule"]
+        ))
+    return wrap_calendar(lines, name)
+
+
+def blocked_vevents(events, approved_ratio, seed=0):
+    """Pick a fraction of source events and return blocked-calendar VEVENT lines for them"""
+    rng = random.Random(f"blocked-{seed}")
+    blocked = {}
+    for event in events:
+        if rng.random() < approved_ratio:
+            blocked[event["uid"]] = "\r\n".join(
+                generate_vevent(event["uid"], event["start"], event["end"], "Busy", "Blocked time")
+            )
+    return blocked
@@ -0,0 +1,257 @@
+"""
+Benchmark harness for calmanage.
+
+Generates synthetic calendars, serves them from a local stub server standing in for
+Google and Radicale, and times the sync, approval fan-out and Flask endpoints.
+
+Usage:
+    python bench/run_bench.py --events 2000 --calendars 2 --latency 0.05 --output bench/results/head.json
+    python bench/run_bench.py --compare bench/results/base.json bench/results/head.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+APP_DIR = REPO_DIR / 'app'
+
+sys.path.insert(0, str(BENCH_DIR))
+
+from ics_generator import generate_events, events_to_ics, blocked_vevents  # noqa: E402
+from stub_server import StubFeedServer  # noqa: E402
+
+BENCHMARKS = ('sync', 'approve', 'remove_approval', 'http_init', 'http_pending_events', 'http_approve')
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=str(REPO_DIR), text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return None
+
+
+def _summarize(samples):
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        'runs': len(samples),
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'mean': statistics.fmean(ordered),
+        'p95': ordered[p95_index],
+        'stdev': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+    }
+
+
+def _time(fn, repeat, warmup, setup=None):
+    """
+    Time fn; setup (untimed) runs before every run. If fn returns a dict of
+    counts, the counts of the timed runs are summed and returned as well.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    samples = []
+    counts = {}
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+        if isinstance(result, dict):
+            for key, value in result.items():
+                counts[key] = counts.get(key, 0) + value
+    return samples, counts
+
+
+def _setup_environment(args, stub, tmpdir):
+    """Build synthetic feeds, point the app at the stub server and import it"""
+    names = [f"cal{i}" for i in range(args.calendars)]
+    source_events = {}
+    for i, name in enumerate(names):
+        events = generate_events(
+            name, args.events, recurrence_density=args.recurrence, history_days=args.history_days,
+            window_days=args.window_days, description_length=args.description_length, seed=args.seed + i
+        )
+        source_events[name] = events
+        stub.set_feed(name, events_to_ics(events, name))
+
+    # Each source's approved events are blocked in every other calendar's blocked feed
+    for name in names:
+        blocked = {}
+        for other in names:
+            if other != name:
+                blocked.update(blocked_vevents(source_events[other], args.approved_ratio, seed=args.seed))
+        stub.set_blocked(name, blocked)
+
+    work_events = generate_events('work', max(args.events // 10, 1), history_days=args.history_days,
+                                  window_days=args.window_days, seed=args.seed)
+    stub.set_feed('work', events_to_ics(work_events, 'Arbejde'))
+
+    os.environ['DATABASE_PATH'] = str(Path(tmpdir) / 'bench.db')
+    os.environ['WARM_CACHE_PATH'] = str(Path(tmpdir) / 'bench.db.cache.json')
+    os.environ['SYNC_WINDOW_DAYS'] = str(args.window_days)
+    os.environ['WORKSCRAPE_ENABLED'] = '0'
+    os.environ['PROFILE_REQUESTS'] = '0'
+    sys.path.insert(0, str(APP_DIR))
+
+    import get_ics
+    get_ics.ICS_URLS.clear()
+    get_ics.BLOCKED_CALENDAR_URLS.clear()
+    for name in names:
+        get_ics.ICS_URLS[name] = stub.feed_url(name)
+        get_ics.BLOCKED_CALENDAR_URLS[name] = stub.blocked_url(name)
+    get_ics.APPROVED_CALENDAR_URL = stub.feed_url('work')
+
+    import app as webapp
+    return get_ics, webapp, source_events
+
+
+def run(args):
+    selected = args.benchmarks or list(BENCHMARKS)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmpdir, StubFeedServer(args.latency, args.jitter, args.etags) as stub:
+        get_ics, webapp, source_events = _setup_environment(args, stub, tmpdir)
+        client = webapp.app.test_client()
+        source = next(iter(source_events))
+        approve_targets = source_events[source][:args.approvals]
+
+        def approve_all():
+            # Count written and skipped ('unchanged') blocked calendar writes separately
+            writes = {}
+            for event in approve_targets:
+                result = get_ics.approve_event(
+                    event['uid'], source, event['start'].isoformat(), event['end'].isoformat(),
+                    event['summary'], event['description'], False, False, 10, 10
+                )
+                for outcome in result.get('targets', {}).values():
+                    writes[outcome] = writes.get(outcome, 0) + 1
+            return writes
+
+        def remove_all():
+            for event in approve_targets:
+                get_ics.remove_approval(event['uid'])
+
+        def http_approve():
+            event = approve_targets[0]
+            client.post('/api/approve', json={
+                'uid': event['uid'], 'source': source,
+                'start': event['start'].isoformat(), 'end': event['end'].isoformat(),
+                'title': event['summary'], 'description': event['description'],
+            })
+
+        benchmarks = {
+            'sync': get_ics.fetch_and_update_ics,
+            'approve': approve_all,
+            'remove_approval': remove_all,
+            'http_init': lambda: client.get('/api/init'),
+            'http_pending_events': lambda: client.get('/api/pending_events'),
+            'http_approve': http_approve,
+        }
+
+        # Every approval run starts from unapproved events and every removal run from
+        # approved ones, so neither times a no-op after the first run
+        def untracked(setup):
+            # Keep setup requests out of the reported upstream request counts
+            def run_setup():
+                saved = dict(stub.request_counts)
+                setup()
+                with stub.lock:
+                    stub.request_counts.update(saved)
+            return run_setup
+        
+        setups = {
+            'approve': untracked(remove_all),
+            'remove_approval': untracked(approve_all),
+            'http_approve': untracked(lambda: get_ics.remove_approval(approve_targets[0]['uid'])),
+        }
+        
+        for name in selected:
+            stub.reset_counts()
+            samples, counts = _time(benchmarks[name], args.repeat, args.warmup, setups.get(name))
+            results[name] = _summarize(samples)
+            results[name]['upstream_requests'] = dict(stub.request_counts)
+            if counts:
+                results[name]['writes'] = counts
+            print(f"{name:22s} median={results[name]['median'] * 1000:9.2f}ms "
+                  f"p95={results[name]['p95'] * 1000:9.2f}ms runs={len(samples)}"
+                  + (f" writes={counts}" if counts else ''))
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        },
+        'results': results,
+    }
+
+
+def compare(base_path, head_path):
+    """Print median changes between two result files"""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(head_path) as f:
+        head = json.load(f)
+
+    print(f"base={base['meta'].get('commit')} head={head['meta'].get('commit')}")
+    for name, head_stats in head['results'].items():
+        base_stats = base['results'].get(name)
+        if not base_stats:
+            print(f"{name:22s} (new)")
+            continue
+        change = (head_stats['median'] - base_stats['median']) / base_stats['median'] * 100 if base_stats['median'] else 0
+        print(f"{name:22s} {base_stats['median'] * 1000:9.2f}ms -> {head_stats['median'] * 1000:9.2f}ms ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark calmanage sync, approvals and endpoints')
+    parser.add_argument('--events', type=int, default=1000, help='Events per source calendar')
+    parser.add_argument('--calendars', type=int, default=2, help='Number of source calendars (each has a blocked calendar)')
+    parser.add_argument('--recurrence', type=float, default=0.1, help='Fraction of events with an RRULE')
+    parser.add_argument('--history-days', type=int, default=365, help='How far into the past events are spread')
+    parser.add_argument('--window-days', type=int, default=90, help='Sync window (SYNC_WINDOW_DAYS)')
+    parser.add_argument('--description-length', type=int, default=200, help='Approximate description length')
+    parser.add_argument('--approved-ratio', type=float, default=0.3, help='Fraction of events present in blocked calendars')
+    parser.add_argument('--approvals', type=int, default=10, help='Events approved/removed per approval benchmark run')
+    parser.add_argument('--latency', type=float, default=0.0, help='Stub server latency per request (seconds)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random stub latency (seconds)')
+    parser.add_argument('--etags', action='store_true', help='Stub server sends ETags and answers 304')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per benchmark')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed warmup runs per benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the generator')
+    parser.add_argument('--benchmarks', nargs='*', choices=BENCHMARKS, help='Subset of benchmarks to run')
+    parser.add_argument('--output', help='Write JSON results to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'), help='Compare two result files and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run(args)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import hashlib
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ics_generator import wrap_calendar
+
+_VEVENT_RE = re.compile(rb"BEGIN:VEVENT.*?END:VEVENT", re.DOTALL)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Serves /feeds/<name>.ics (read-only) and /blocked/<name>/ (CalDAV-ish GET/PUT/DELETE)"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _delay(self):
+        stub = self.server.stub
+        latency = stub.latency
+        if stub.jitter:
+            latency += random.uniform(0, stub.jitter)
+        if latency > 0:
+            time.sleep(latency)
+
+    def _send(self, status, body=b"", content_type="text/calendar; charset=utf-8", etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _split_path(self):
+        parts = [p for p in self.path.split("?")[0].split("/") if p]
+        return parts
+
+    def do_GET(self):
+        self._delay()
+        stub = self.server.stub
+        parts = self._split_path()
+        with stub.lock:
+            stub.request_counts["GET"] += 1
+            if len(parts) == 2 and parts[0] == "feeds" and parts[1].endswith(".ics"):
+                body = stub.feeds.get(parts[1][:-4])
+            elif len(parts) == 2 and parts[0] == "blocked":
+                blocked = stub.blocked.get(parts[1])
+                body = None if blocked is None else wrap_calendar(
+                    [line for vevent in blocked.values() for line in vevent.split("\r\n")],
+                    f"Blocked {parts[1]}"
+                )
+            else:
+                body = None
+        if body is None:
+            self._send(404, b"not found", "text/plain")
+            return
+        etag = None
+        if stub.etags:
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                with stub.lock:
+                    stub.request_counts["NOT_MODIFIED"] += 1
+                self._send(304, b"", etag=etag)
+                return
+        self._send(200, body, etag=etag)
+
+    def do_PUT(self):
+        self._delay()
+        stub = self.server.stub
+        parts = self._split_path()
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length) if length else b""
+        with stub.lock:
+            stub.request_counts["PUT"] += 1
+            if len(parts) != 3 or parts[0] != "blocked" or parts[1] not in stub.blocked:
+                status = 404
+            else:
+                match = _VEVENT_RE.search(data)
+                uid = parts[2][:-4] if parts[2].endswith(".ics") else parts[2]
+                existed = uid in stub.blocked[parts[1]]
+                stub.blocked[parts[1]][uid] = match.group(0).decode("utf-8") if match else ""
+                status = 204 if existed else 201
+        self._send(status, b"", "text/plain")
+
+    def do_DELETE(self):
+        self._delay()
+        stub = self.server.stub
+        parts = self._split_path()
+        with stub.lock:
+            stub.request_counts["DELETE"] += 1
+            if len(parts) != 3 or parts[0] != "blocked" or parts[1] not in stub.blocked:
+                status = 404
+            else:
+                uid = parts[2][:-4] if parts[2].endswith(".ics") else parts[2]
+                status = 204 if stub.blocked[parts[1]].pop(uid, None) is not None else 404
+        self._send(status, b"", "text/plain")
+
+
+class StubFeedServer:
+    """
+    Local HTTP server standing in for Google ICS feeds and Radicale blocked calendars.
+
+    Args:
+        latency: Fixed delay (seconds) added to every request
+        jitter: Extra random delay (seconds) in [0, jitter]
+        etags: Send ETags and answer If-None-Match with 304 (like Radicale)
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, etags=False, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.etags = etags
+        self.feeds = {}  # {name: ics bytes}
+        self.blocked = {}  # {name: {uid: vevent text}}
+        self.request_counts = {"GET": 0, "PUT": 0, "DELETE": 0, "NOT_MODIFIED": 0}
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def feed_url(self, name):
+        return f"{self.base_url}/feeds/{name}.ics"
+
+    def blocked_url(self, name):
+        # Trailing slash: get_ics appends "<uid>.ics" to this URL
+        return f"{self.base_url}/blocked/{name}/"
+
+    def set_feed(self, name, ics_bytes):
+        with self.lock:
+            self.feeds[name] = ics_bytes
+
+    def set_blocked(self, name, vevents):
+        with self.lock:
+            self.blocked[name] = dict(vevents)
+
+    def reset_counts(self):
+        with self.lock:
+            for method in self.request_counts:
+                self.request_counts[method] = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
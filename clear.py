@@ -1,28 +1,233 @@
-from caldav import DAVClient
+"""
+Bulk maintenance for the Radicale calendars.
+
+Deletes events from calendars picked by name (e.g. "Arbejde") or from the blocked
+calendars, optionally filtered by date range and summary. Deletes run concurrently
+over one pooled HTTP session.
+
+Usage:
+    python clear.py --calendar Arbejde --dry-run
+    python clear.py --calendar Arbejde --start 2026-01-01 --end 2026-02-01
+    python clear.py --blocked family --summary Busy
+    python clear.py --blocked all --drop-collection
+"""
+import argparse
 import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from urllib.parse import urlparse
+
+import pytz
+import requests
+from requests.adapters import HTTPAdapter
+from caldav import DAVClient
+from icalendar import Calendar
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# APPROVED_CALENDAR_URL = os.getenv("APPROVED_CALENDAR_URL")
-APPROVED_CALENDAR_URL = "http://100.70.0.50:5232/t/dfa4c16e-e299-3007-f60f-5eaa70f0c2cc/"
+APPROVED_CALENDAR_URL = os.getenv("APPROVED_CALENDAR_URL")
 USERNAME = os.getenv("RADICALE_USERNAME")
 PASSWORD = os.getenv("RADICALE_PASSWORD")
 
-client = DAVClient(
-    url=APPROVED_CALENDAR_URL,
-    username=USERNAME,
-    password=PASSWORD
-)
+BLOCKED_CALENDAR_URLS = {
+    "family": os.getenv("FAMILY_BLOCKED_CALENDAR_URL"),
+    "Ronja": os.getenv("RONJA_BLOCKED_CALENDAR_URL")
+}
+
+LOCAL_TZ = pytz.timezone("Europe/Copenhagen")
+PROGRESS_EVERY = 100  # Print progress after this many deletes
+
+
+def parse_date(value):
+    """ISO date or datetime; naive values are local (Europe/Copenhagen) time"""
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = LOCAL_TZ.localize(dt)
+    return dt
+
+
+def select_calendars(client, args):
+    """Return [(label, caldav calendar)] for the requested names and blocked calendars"""
+    selected = []
+
+    if args.calendar:
+        calendars = client.principal().calendars()
+        by_name = {cal.name: cal for cal in calendars}
+        for name in args.calendar:
+            if name not in by_name:
+                available = ", ".join(sorted(str(n) for n in by_name))
+                raise SystemExit(f"Calendar '{name}' not found (available: {available})")
+            selected.append((name, by_name[name]))
+
+    if args.blocked:
+        names = list(BLOCKED_CALENDAR_URLS) if "all" in args.blocked else args.blocked
+        for name in names:
+            url = BLOCKED_CALENDAR_URLS.get(name)
+            if not url:
+                raise SystemExit(f"No blocked calendar URL configured for '{name}'")
+            selected.append((f"blocked {name}", client.calendar(url=url)))
+
+    return selected
+
+
+def event_summary(obj):
+    """(start, summary) of the first VEVENT in a calendar object"""
+    cal = Calendar.from_ical(obj.data)
+    for component in cal.walk():
+        if component.name == "VEVENT":
+            start = component.get("dtstart")
+            return (start.dt if start else None), str(component.get("summary", ""))
+    return None, ""
+
+
+def find_events(calendar, args):
+    """Calendar objects matching the date range (server side) and summary (client side)"""
+    if args.start or args.end:
+        objects = calendar.search(start=args.start, end=args.end, event=True)
+    else:
+        objects = calendar.events()
+
+    matches = []
+    for obj in objects:
+        start, summary = event_summary(obj)
+        if args.summary and args.summary.lower() not in summary.lower():
+            continue
+        matches.append((str(obj.url), start, summary))
+    return matches
+
+
+def make_session(workers):
+    """One authenticated session whose connection pool fits all workers"""
+    session = requests.Session()
+    if USERNAME:
+        session.auth = (USERNAME, PASSWORD)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def delete_events(session, label, matches, workers):
+    """Delete calendar objects concurrently; returns (deleted, failed)"""
+    deleted = failed = 0
+    started = time.perf_counter()
+
+    def delete(url):
+        response = session.delete(url, timeout=30)
+        # Already gone counts as done
+        return response.ok or response.status_code == 404
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(delete, url): url for url, _, _ in matches}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                if future.result():
+                    deleted += 1
+                else:
+                    failed += 1
+                    print(f"  Failed to delete {futures[future]}")
+            except requests.RequestException as e:
+                failed += 1
+                print(f"  Error deleting {futures[future]}: {e}")
+            if done % PROGRESS_EVERY == 0 or done == len(futures):
+                elapsed = time.perf_counter() - started
+                print(f"  {label}: {done}/{len(futures)} ({done / elapsed if elapsed else 0:.0f}/s)")
+
+    return deleted, failed
+
+
+def collection_path(url):
+    """Path of a collection URL with exactly one trailing slash"""
+    return urlparse(str(url)).path.rstrip("/") + "/"
+
+
+def drop_collection(client, calendar):
+    """
+    Delete the whole collection and recreate it empty at the same URL.
+    Only the display name is carried over; colour, ACLs and other collection
+    properties are lost.
+    """
+    principal = client.principal()
+    original_path = collection_path(calendar.url)
+    parent_path = original_path.rstrip("/").rsplit("/", 1)[0] + "/"
+    home_path = collection_path(principal.calendar_home_set.url)
+
+    # make_calendar creates the collection under the calendar home; anywhere else it
+    # would come back at a different URL and break the app's URLs and subscriptions
+    if parent_path != home_path:
+        raise SystemExit(f"Refusing to drop {calendar.url}: it is not directly in the calendar home {home_path}")
+
+    display_name = calendar.get_display_name()
+    cal_id = original_path.rstrip("/").split("/")[-1]
+    calendar.delete()
+
+    try:
+        recreated = principal.make_calendar(name=display_name, cal_id=cal_id)
+    except Exception as e:
+        raise SystemExit(f"ERROR: deleted {calendar.url} but could not recreate it ({e}). "
+                         f"Recreate calendar '{display_name}' with id '{cal_id}' by hand.")
+
+    if collection_path(recreated.url) != original_path:
+        raise SystemExit(f"ERROR: {calendar.url} was recreated at {recreated.url}. "
+                         f"Update the calendar URLs (and subscriptions) or move it back.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk delete events from Radicale calendars")
+    parser.add_argument("--calendar", action="append", help='Calendar display name, e.g. "Arbejde" (repeatable)')
+    parser.add_argument("--blocked", nargs="+", help='Blocked calendars by source name, or "all"')
+    parser.add_argument("--start", type=parse_date, help="Only events overlapping this date or later")
+    parser.add_argument("--end", type=parse_date, help="Only events overlapping before this date")
+    parser.add_argument("--summary", help="Only events whose summary contains this text (case-insensitive)")
+    parser.add_argument("--dry-run", action="store_true", help="List what would be deleted")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent deletes")
+    parser.add_argument("--drop-collection", action="store_true",
+                        help="Without filters: delete and recreate the whole collection instead of each event")
+    args = parser.parse_args()
+
+    if not args.calendar and not args.blocked:
+        parser.error("select calendars with --calendar and/or --blocked")
+    filtered = bool(args.start or args.end or args.summary)
+    if args.drop_collection and filtered:
+        parser.error("--drop-collection cannot be combined with --start, --end or --summary")
+
+    client = DAVClient(url=APPROVED_CALENDAR_URL, username=USERNAME, password=PASSWORD)
+    session = make_session(args.workers)
+    total_started = time.perf_counter()
+    total_failed = 0
+
+    for label, calendar in select_calendars(client, args):
+        started = time.perf_counter()
+
+        if args.drop_collection:
+            print(f"Warning: {label}: recreating the collection keeps only its display name; "
+                  f"colour, ACLs and other properties are lost")
+            if args.dry_run:
+                print(f"{label}: would delete and recreate {calendar.url}")
+                continue
+            drop_collection(client, calendar)
+            print(f"{label}: collection recreated in {time.perf_counter() - started:.2f}s")
+            continue
+
+        matches = find_events(calendar, args)
+        print(f"{label}: {len(matches)} matching events (listed in {time.perf_counter() - started:.2f}s)")
 
-principal = client.principal()
-calendar = principal.calendars()[0]  # or select by name
+        if args.dry_run:
+            for _, start, summary in matches:
+                print(f"  {start}  {summary}")
+            continue
 
-events = calendar.events()
+        deleted, failed = delete_events(session, label, matches, args.workers)
+        total_failed += failed
+        print(f"{label}: deleted {deleted}, failed {failed} in {time.perf_counter() - started:.2f}s")
 
-print(f"Found {len(events)} events. Deleting...")
+    session.close()
+    print(f"Done in {time.perf_counter() - total_started:.2f}s")
+    sys.exit(1 if total_failed else 0)
 
-for event in events:
-    event.delete()
 
-print("Calendar cleared successfully.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
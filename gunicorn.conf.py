@@ -0,0 +1,24 @@
+import os
+import shutil
+import tempfile
+
+# Multi-worker serving. Every worker imports app.py; the workscrape scheduler
+# only runs in the worker holding the scheduler lock (see app/jobs.py).
+# Import app/app.py without changing directory: relative paths such as the default
+# DATABASE_PATH stay relative to the repo root, where `python app/app.py` kept them
+pythonpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app')
+wsgi_app = 'app:app'
+bind = os.getenv('BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_WORKERS', '2'))
+threads = int(os.getenv('WEB_THREADS', '4'))
+timeout = 60
+accesslog = '-'
+
+# Workers write their metrics here so /api/metrics can sum them (see app/metrics.py)
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'calmanage-metrics'))
+
+
+def on_starting(server):
+    # Totals start from zero with the server, like a single-process registry
+    shutil.rmtree(os.environ['METRICS_DIR'], ignore_errors=True)
+    os.makedirs(os.environ['METRICS_DIR'], exist_ok=True)
@@ -0,0 +1,178 @@
+"""
+Behaviour of the orphaned blocked event reconciler against the bench stub server.
+
+Run with: python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(REPO_DIR / 'bench'), str(REPO_DIR / 'app')]
+
+_tmpdir = tempfile.mkdtemp(prefix='calmanage-test-')
+os.environ['DATABASE_PATH'] = os.path.join(_tmpdir, 'test.db')
+os.environ['WARM_CACHE_PATH'] = os.path.join(_tmpdir, 'test.db.cache.json')
+os.environ['WORKSCRAPE_ENABLED'] = '0'
+
+from ics_generator import generate_vevent, wrap_calendar  # noqa: E402
+from stub_server import StubFeedServer  # noqa: E402
+import get_ics  # noqa: E402
+import jobs  # noqa: E402
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def _vevent(uid, start, end, summary='Busy'):
+    return '\r\n'.join(generate_vevent(uid, start, end, summary))
+
+
+def _calendar(vevents):
+    return wrap_calendar([line for vevent in vevents for line in vevent.split('\r\n')])
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """
+    family has one upcoming and one ongoing event. Ronja's blocked calendar holds the
+    approvals of both, plus one event that is over and one whose source event is gone.
+    """
+    with StubFeedServer() as server:
+        family = [
+            _vevent('upcoming', NOW + timedelta(days=2), NOW + timedelta(days=2, hours=1), 'Upcoming'),
+            _vevent('ongoing', NOW - timedelta(hours=1), NOW + timedelta(hours=1), 'Ongoing'),
+        ]
+        server.set_feed('family', _calendar(family))
+        server.set_feed('Ronja', _calendar([
+            _vevent('ronja-own', NOW + timedelta(days=3), NOW + timedelta(days=3, hours=1)),
+        ]))
+        server.set_feed('work', _calendar([]))
+        server.set_blocked('family', {})
+        server.set_blocked('Ronja', {
+            'upcoming': _vevent('upcoming', NOW + timedelta(days=2), NOW + timedelta(days=2, hours=1)),
+            'ongoing': _vevent('ongoing', NOW - timedelta(hours=1), NOW + timedelta(hours=1)),
+            'past': _vevent('past', NOW - timedelta(days=5), NOW - timedelta(days=5) + timedelta(hours=1)),
+            'gone': _vevent('gone', NOW + timedelta(days=4), NOW + timedelta(days=4, hours=1)),
+        })
+
+        monkeypatch.setattr(get_ics, 'ICS_URLS', {
+            'family': server.feed_url('family'), 'Ronja': server.feed_url('Ronja')
+        })
+        monkeypatch.setattr(get_ics, 'BLOCKED_CALENDAR_URLS', {
+            'family': server.blocked_url('family'), 'Ronja': server.blocked_url('Ronja')
+        })
+        monkeypatch.setattr(get_ics, 'APPROVED_CALENDAR_URL', server.feed_url('work'))
+        monkeypatch.setattr(get_ics, 'BLOCKED_RECONCILE_MODE', 'off')
+        monkeypatch.setattr(get_ics, '_latest_snapshot', None)
+        monkeypatch.setattr(get_ics, '_feed_cache', {})
+        monkeypatch.setattr(get_ics, '_feed_health', {})
+        monkeypatch.setattr(get_ics, '_feed_fetched_at', {})
+        monkeypatch.setattr(get_ics, '_blocked_hashes', {})
+        monkeypatch.setattr(get_ics, '_last_reconcile', {'started_at': 0.0, 'report': None})
+        yield server
+
+
+def test_deletes_past_and_missing_events(stub):
+    get_ics.sync_events()
+    report = get_ics.reconcile_blocked_calendars(dry_run=False)
+
+    assert set(stub.blocked['Ronja']) == {'upcoming', 'ongoing'}
+    assert report['calendars']['Ronja']['past'] == 1
+    assert report['calendars']['Ronja']['missing'] == 1
+    assert report['calendars']['Ronja']['deleted'] == 2
+    assert report['calendars']['Ronja']['uids'] == ['gone', 'past']
+
+
+def test_keeps_ongoing_events(stub):
+    # Source feeds are parsed without events that already started, so "ongoing"
+    # is not in the source rows but must not count as orphaned
+    get_ics.sync_events()
+    report = get_ics.reconcile_blocked_calendars(dry_run=False)
+
+    assert 'ongoing' in stub.blocked['Ronja']
+    assert 'ongoing' not in report['calendars']['Ronja']['uids']
+
+
+def test_dry_run_deletes_nothing(stub):
+    get_ics.sync_events()
+    report = get_ics.reconcile_blocked_calendars(dry_run=True)
+
+    assert report['calendars']['Ronja']['uids'] == ['gone', 'past']
+    assert report['calendars']['Ronja']['deleted'] == 0
+    assert stub.request_counts['DELETE'] == 0
+    assert len(stub.blocked['Ronja']) == 4
+
+
+def test_stale_source_skips_pass(stub):
+    get_ics.sync_events()
+    del stub.feeds['family']  # Fetch fails, last good copy is served stale
+    snapshot = get_ics.sync_events()
+    assert 'family' in snapshot.stale_feeds
+
+    report = get_ics.reconcile_blocked_calendars(dry_run=False)
+
+    assert report['calendars'] == {}
+    assert 'family' in report['skipped']['Ronja']
+    assert stub.request_counts['DELETE'] == 0
+
+
+def test_empty_source_skips_pass(stub):
+    stub.set_feed('family', _calendar([]))
+    get_ics.sync_events()
+    report = get_ics.reconcile_blocked_calendars(dry_run=False)
+
+    assert report['calendars'] == {}
+    assert 'empty' in report['skipped']['Ronja']
+    assert stub.request_counts['DELETE'] == 0
+
+
+def test_restart_does_not_trust_warm_cache_rows(stub, monkeypatch):
+    get_ics.sync_events()
+    # An event is approved while the source feed that has it cannot be fetched
+    stub.blocked['Ronja']['new'] = _vevent('new', NOW + timedelta(days=6), NOW + timedelta(days=6, hours=1))
+    del stub.feeds['family']
+    snapshot = get_ics.sync_events()
+    assert 'family' in snapshot.stale_feeds
+    time.sleep(0.5)  # Let the warm cache be written
+
+    # Restart: only what the warm cache persisted is known
+    monkeypatch.setattr(get_ics, '_latest_snapshot', None)
+    monkeypatch.setattr(get_ics, '_feed_cache', {})
+    monkeypatch.setattr(get_ics, '_feed_fetched_at', {})
+    monkeypatch.setattr(get_ics, '_blocked_hashes', {})
+    get_ics.load_warm_start()
+    assert get_ics.get_latest_snapshot() is not None
+
+    report = get_ics.reconcile_blocked_calendars(dry_run=False)
+
+    assert report['calendars'] == {}
+    assert 'new' in stub.blocked['Ronja']
+    assert stub.request_counts['DELETE'] == 0
+
+
+def test_automatic_pass_only_in_elected_process(stub, monkeypatch):
+    monkeypatch.setattr(get_ics, 'BLOCKED_RECONCILE_MODE', 'delete')
+    monkeypatch.setattr(get_ics, 'BLOCKED_RECONCILE_INTERVAL_SECONDS', 0)
+    lock_path = os.path.join(_tmpdir, 'reconcile.lock')
+
+    # Another process holds the lock: syncing here must not delete anything
+    other = jobs.LeaderElection(lock_path)
+    assert other.try_acquire()
+    monkeypatch.setattr(jobs, 'election', jobs.LeaderElection(lock_path))
+    get_ics.sync_events()
+    time.sleep(0.5)
+    assert get_ics.get_reconcile_report() is None
+    assert len(stub.blocked['Ronja']) == 4
+
+    # Once it is gone, this process is elected and runs the pass
+    os.close(other._fd)
+    get_ics.sync_events()
+    deadline = time.time() + 5
+    while get_ics.get_reconcile_report() is None and time.time() < deadline:
+        time.sleep(0.05)
+    assert set(stub.blocked['Ronja']) == {'upcoming', 'ongoing'}